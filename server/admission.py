@@ -0,0 +1,232 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import decode_token
+
+from metrics import labels
+
+ROUTE_CLASSES = ('auth', 'reads', 'writes', 'analytics')
+# Endpoints whose class is not implied by the HTTP method
+ENDPOINT_CLASSES = {
+    'api.register_user': 'auth',
+    'api.login_user': 'auth',
+    'api.track_revenue': 'analytics',
+    'api.revenue_analytics_report': 'analytics',
+    'api.export_orders': 'analytics',
+}
+# Never limited: health, monitoring and the long-lived order event stream
+EXEMPT_ENDPOINTS = {'api.index', 'metrics', 'api.stream_orders', 'static'}
+# Token buckets tracked at once; the least recently used (and so most refilled) are dropped first
+MAX_BUCKETS = 100000
+# Verified access tokens remembered, so the limiter does not decode the same token on every request
+MAX_CACHED_TOKENS = 10000
+# Keys listed as most throttled on the limiter state endpoint
+THROTTLED_SHOWN = 20
+# Longest account name kept in an auth bucket key
+MAX_ACCOUNT_LENGTH = 254
+
+# "auth=0.2/10,reads=20/60" -> {'auth': (0.2, 10.0), 'reads': (20.0, 60.0)}: refill rate per second / burst
+def parse_rate_limits(value):
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        route_class, _, budget = item.partition('=')
+        rate, _, burst = budget.partition('/')
+        limits[route_class.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+# "reads=64,analytics=4" -> {'reads': 64, 'analytics': 4}
+def parse_concurrency_limits(value):
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        route_class, _, limit = item.partition('=')
+        limits[route_class.strip()] = int(limit)
+    return limits
+
+def route_class(endpoint, method):
+    if endpoint in ENDPOINT_CLASSES:
+        return ENDPOINT_CLASSES[endpoint]
+    return 'reads' if method in ('GET', 'HEAD') else 'writes'
+
+# Admission control in front of every view. Each (route class, caller) pair has a token bucket:
+# callers are identified by their JWT identity, or by address when there is no valid token (see
+# _auth_buckets for login and register), and a caller over budget gets 429. Each route class also
+# has a cap on requests in progress in this process; past it, requests are shed with 503 instead
+# of queueing behind the busy workers. Classes without a configured budget or cap are not limited.
+class AdmissionControl:
+    def __init__(self, app=None, metrics=None):
+        self._buckets = OrderedDict()
+        self._tokens = OrderedDict()
+        self._in_flight = {route_class: 0 for route_class in ROUTE_CLASSES}
+        self._rejected = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, metrics)
+
+    def init_app(self, app, metrics=None):
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        self.rate_limits = app.config['RATE_LIMITS']
+        self.concurrency_limits = app.config['CONCURRENCY_LIMITS']
+        if not self.enabled:
+            return
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+        if metrics is not None:
+            metrics.add_collector(self.render)
+
+    # Bucket key for the request: the verified JWT identity, else the client address
+    def _caller(self):
+        header = request.headers.get('Authorization', '')
+        if not header.startswith('Bearer '):
+            return f'ip:{request.remote_addr}'
+        token = header[7:]
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(token)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        try:
+            claims = decode_token(token)
+        except Exception:
+            # Invalid or expired token: the view rejects it; limit the attempt by address
+            return f'ip:{request.remote_addr}'
+        caller = f"user:{claims[current_app.config['JWT_IDENTITY_CLAIM']]}"
+        with self._lock:
+            self._tokens[token] = (caller, claims.get('exp', now + 60))
+            while len(self._tokens) > MAX_CACHED_TOKENS:
+                self._tokens.popitem(last=False)
+        return caller
+
+    # Buckets charged for login and register. Register is keyed by address only, as the account it
+    # names is the caller's own choice. Login is keyed by the submitted email (or username) plus the
+    # client address, so people behind one NAT or proxy do not share a budget while guesses at one
+    # account from one address are still limited; an `auth_address` bucket per address, with a
+    # larger burst, also stops one address from spraying guesses across many accounts.
+    def _auth_buckets(self):
+        address = f'ip:{request.remote_addr}'
+        if request.endpoint == 'api.register_user':
+            return [('auth', address)]
+        data = request.get_json(silent=True)
+        account = ''
+        if isinstance(data, dict):
+            account = data.get('email') or data.get('username') or ''
+        account = str(account).strip().lower()[:MAX_ACCOUNT_LENGTH]
+        return [('auth_address', address), ('auth', f'account:{account}@{request.remote_addr}')]
+
+    def _reject(self, route_class, reason, status, retry_after, message):
+        with self._lock:
+            self._rejected[(route_class, reason)] = self._rejected.get((route_class, reason), 0) + 1
+        return jsonify({'message': message}), status, {'Retry-After': str(retry_after)}
+
+    # Take a token from the caller's bucket; returns seconds until one is available, or 0 if admitted
+    def _take_token(self, route_class, caller):
+        rate, burst = self.rate_limits[route_class]
+        now = time.monotonic()
+        key = (route_class, caller)
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate if rate > 0 else 60
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def _admit(self):
+        endpoint = request.endpoint
+        if endpoint is None or endpoint in EXEMPT_ENDPOINTS or request.method == 'OPTIONS':
+            return None
+        cls = route_class(endpoint, request.method)
+
+        buckets = self._auth_buckets() if cls == 'auth' else [(cls, None)]
+        for bucket_class, caller in buckets:
+            if bucket_class not in self.rate_limits:
+                continue
+            wait = self._take_token(bucket_class, caller or self._caller())
+            if wait:
+                return self._reject(cls, 'rate', 429, math.ceil(wait), 'Too many requests, please slow down')
+
+        limit = self.concurrency_limits.get(cls)
+        with self._lock:
+            if limit is not None and self._in_flight[cls] >= limit:
+                shed = True
+            else:
+                shed = False
+                self._in_flight[cls] += 1
+                g.admission_class = cls
+        if shed:
+            return self._reject(cls, 'concurrency', 503, 1, 'Server busy, please retry shortly')
+        return None
+
+    def _release(self, exc=None):
+        cls = g.pop('admission_class', None)
+        if cls is not None:
+            with self._lock:
+                self._in_flight[cls] -= 1
+
+    # Current limits, load and rejections, plus the callers closest to their limit
+    def state(self):
+        now = time.monotonic()
+        with self._lock:
+            buckets = []
+            for (cls, caller), (tokens, updated) in self._buckets.items():
+                rate, burst = self.rate_limits[cls]
+                buckets.append((min(burst, tokens + (now - updated) * rate), cls, caller))
+            in_flight = dict(self._in_flight)
+            rejected = dict(self._rejected)
+        buckets.sort(key=lambda bucket: bucket[0])
+        return {
+            'enabled': self.enabled,
+            'classes': {
+                cls: {
+                    'rate': self.rate_limits[cls][0] if cls in self.rate_limits else None,
+                    'burst': self.rate_limits[cls][1] if cls in self.rate_limits else None,
+                    'concurrencyLimit': self.concurrency_limits.get(cls),
+                    'inFlight': in_flight[cls],
+                    'rejected': {
+                        reason: rejected.get((cls, reason), 0) for reason in ('rate', 'concurrency')
+                    },
+                }
+                for cls in ROUTE_CLASSES
+            },
+            'trackedCallers': len(buckets),
+            'mostThrottled': [
+                {'class': cls, 'caller': caller, 'tokens': round(tokens, 2)}
+                for tokens, cls, caller in buckets[:THROTTLED_SHOWN]
+            ],
+        }
+
+    # Prometheus series appended to /metrics
+    def render(self):
+        with self._lock:
+            in_flight = dict(self._in_flight)
+            rejected = sorted(self._rejected.items())
+            tracked = len(self._buckets)
+        lines = [
+            '# HELP mealy_admission_in_flight Requests in progress per route class.',
+            '# TYPE mealy_admission_in_flight gauge',
+        ]
+        lines += [f'mealy_admission_in_flight{labels(route_class=cls)} {count}' for cls, count in in_flight.items()]
+        lines += [
+            '# HELP mealy_admission_concurrency_limit Concurrency cap per route class.',
+            '# TYPE mealy_admission_concurrency_limit gauge',
+        ]
+        lines += [f'mealy_admission_concurrency_limit{labels(route_class=cls)} {limit}' for cls, limit in self.concurrency_limits.items()]
+        lines += [
+            '# HELP mealy_admission_rejected_total Requests rejected by rate limit (429) or concurrency cap (503).',
+            '# TYPE mealy_admission_rejected_total counter',
+        ]
+        lines += [f'mealy_admission_rejected_total{labels(route_class=cls, reason=reason)} {count}' for (cls, reason), count in rejected]
+        lines += [
+            '# HELP mealy_rate_limit_tracked_callers Token buckets currently tracked.',
+            '# TYPE mealy_rate_limit_tracked_callers gauge',
+            f'mealy_rate_limit_tracked_callers {tracked}',
+        ]
+        return lines
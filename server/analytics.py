@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+from config import app_service, db
+from models import MealOption, PrepCount
+from sqlalchemy import event, select
+
+GRANULARITIES = ('day', 'week', 'month')
+ROLLING_WINDOWS = (7, 30)
+
+# Vectorized revenue analytics. Per (date, meal, status) totals come from the prep_counts rollup,
+# which the order write paths keep current for live and archived orders alike, and the per-day
+# arrays are kept in DayAggregates, so a request only reads days it has not seen since they last
+# changed; every grouping after that is a bincount over the cached rows.
+
+# Columns of a per-day aggregate array
+MEAL, STATUS, QUANTITY, REVENUE, ORDERS = range(5)
+
+# Order statuses as small integer codes, so aggregates stay purely numeric
+class StatusCodes:
+    def __init__(self):
+        self._codes = {}
+        self._names = []
+        self._lock = threading.Lock()
+
+    def code(self, status):
+        status = status or 'Pending'
+        code = self._codes.get(status)
+        if code is None:
+            with self._lock:
+                code = self._codes.setdefault(status, len(self._names))
+                if code == len(self._names):
+                    self._names.append(status)
+        return code
+
+    def name(self, code):
+        return self._names[int(code)]
+
+status_codes = StatusCodes()
+
+# Rollup rows for [start, end]: one indexed range read of at most days x meals x statuses rows
+def day_aggregates_query(start, end):
+    return (
+        select(PrepCount.date, PrepCount.meal_option_id, PrepCount.status,
+               PrepCount.quantity, PrepCount.revenue, PrepCount.order_count)
+        .where(PrepCount.date >= start, PrepCount.date <= end, PrepCount.order_count != 0)
+    )
+
+# Returns {date: array of (meal, status, quantity, revenue, orders)}, empty for days without orders
+def fetch_day_aggregates(start, end):
+    rows = db.session.execute(day_aggregates_query(start, end)).all()
+    by_day = {}
+    for order_date, meal_id, status, quantity, revenue, orders in rows:
+        by_day.setdefault(order_date, []).append((meal_id, status_codes.code(status), quantity or 0, revenue or 0, orders))
+    return {
+        start + timedelta(days=offset): np.array(by_day.get(start + timedelta(days=offset), ()), dtype=np.float64).reshape(-1, 5)
+        for offset in range((end - start).days + 1)
+    }
+
+# Expiry time for a cache entry kept at most `max_age` seconds (0 = until invalidated). Invalidation
+# only reaches the process that committed the write, so this bounds staleness in the others.
+def expiry(max_age):
+    return time.monotonic() + max_age if max_age else None
+
+# Value of an (expires, value) cache entry, or None if it is missing or expired (and then dropped)
+def fresh(entries, key):
+    entry = entries.get(key)
+    if entry is None:
+        return None
+    if entry[0] is not None and entry[0] <= time.monotonic():
+        del entries[key]
+        return None
+    return entry[1]
+
+# Per-day aggregates, LRU by day. Dropped for the dates an order write commits to, so the next
+# request re-aggregates just those days instead of the whole range.
+class DayAggregates:
+    def __init__(self, max_days=5000, max_age=0):
+        self.max_days = max_days
+        self.max_age = max_age
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get_range(self, start, end):
+        n_days = (end - start).days + 1
+        with self._lock:
+            days = [fresh(self._days, start + timedelta(days=offset)) for offset in range(n_days)]
+            generation = self.generation
+        missing = [offset for offset, day in enumerate(days) if day is None]
+        # One query per contiguous run of missing days
+        runs = []
+        for offset in missing:
+            if runs and runs[-1][1] == offset - 1:
+                runs[-1][1] = offset
+            else:
+                runs.append([offset, offset])
+        fetched = {}
+        for first, last in runs:
+            fetched.update(fetch_day_aggregates(start + timedelta(days=first), start + timedelta(days=last)))
+        for offset in missing:
+            days[offset] = fetched[start + timedelta(days=offset)]
+        with self._lock:
+            if fetched and generation == self.generation:
+                expires = expiry(self.max_age)
+                self._days.update((day, (expires, aggregates)) for day, aggregates in fetched.items())
+            for offset in range(n_days):
+                day = start + timedelta(days=offset)
+                if day in self._days:
+                    self._days.move_to_end(day)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+        return days
+
+    def invalidate(self, dates=None):
+        with self._lock:
+            self.generation += 1
+            if dates is None:
+                self._days.clear()
+                return
+            for changed in dates:
+                self._days.pop(changed, None)
+
+day_aggregates = app_service('day_aggregates')
+
+def rolling_mean(values, window):
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+def grouped(keys, columns):
+    labels, codes = np.unique(keys, return_inverse=True)
+    return labels, codes, {name: np.bincount(codes, weights=values, minlength=len(labels)) for name, values in columns.items()}
+
+def period_labels(days, granularity):
+    if granularity == 'month':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        return days - ((days.astype(np.int64) + 3) % 7)
+    return days
+
+def compute_revenue_analytics(start, end, granularity='day'):
+    lead_in = max(ROLLING_WINDOWS) - 1
+    first_day = np.datetime64(start - timedelta(days=lead_in), 'D')
+    n_days = (end - start).days + 1 + lead_in
+    days = first_day + np.arange(n_days)
+
+    per_day = day_aggregates.get_range(start - timedelta(days=lead_in), end)
+    rows = np.concatenate(per_day)
+    day_index = np.repeat(np.arange(n_days), [len(day) for day in per_day])
+
+    daily_revenue = np.bincount(day_index, weights=rows[:, REVENUE], minlength=n_days)
+    daily_orders = np.bincount(day_index, weights=rows[:, ORDERS], minlength=n_days)
+    rolling = {window: rolling_mean(daily_revenue, window)[lead_in - window + 1:] for window in ROLLING_WINDOWS}
+
+    # Everything below covers [start, end] only
+    rows = rows[day_index >= lead_in]
+    days, daily_revenue, daily_orders = days[lead_in:], daily_revenue[lead_in:], daily_orders[lead_in:]
+    periods, period_codes, period_totals = grouped(period_labels(days, granularity), {
+        'revenue': daily_revenue, 'orders': daily_orders
+    })
+
+    meal_ids, _, by_meal = grouped(rows[:, MEAL].astype(np.int64), {
+        'revenue': rows[:, REVENUE],
+        'quantity': rows[:, QUANTITY],
+        'orders': rows[:, ORDERS],
+    })
+    statuses, _, by_status = grouped(rows[:, STATUS].astype(np.int64), {
+        'revenue': rows[:, REVENUE],
+        'orders': rows[:, ORDERS],
+    })
+    meal_names = dict(db.session.execute(
+        select(MealOption.id, MealOption.name).where(MealOption.id.in_(meal_ids.tolist()))
+    ).all()) if len(meal_ids) else {}
+
+    return {
+        'from': str(start),
+        'to': str(end),
+        'granularity': granularity,
+        'totals': {
+            'revenue': float(daily_revenue.sum()),
+            'orders': int(daily_orders.sum()),
+            'quantity': int(by_meal['quantity'].sum()) if len(meal_ids) else 0,
+        },
+        'series': [
+            {'period': str(period), 'revenue': float(revenue), 'orders': int(orders)}
+            for period, revenue, orders in zip(periods, period_totals['revenue'], period_totals['orders'])
+        ],
+        'rolling': [
+            {'date': str(day), 'revenue': float(revenue), 'avg7': float(avg7), 'avg30': float(avg30)}
+            for day, revenue, avg7, avg30 in zip(days, daily_revenue, rolling[7], rolling[30])
+        ],
+        'byMeal': sorted((
+            {'mealOptionId': int(meal_id), 'meal': meal_names.get(int(meal_id)), 'revenue': float(revenue),
+             'quantity': int(quantity), 'orders': int(orders)}
+            for meal_id, revenue, quantity, orders in zip(meal_ids, by_meal['revenue'], by_meal['quantity'], by_meal['orders'])
+        ), key=lambda row: -row['revenue']),
+        'byStatus': [
+            {'status': status_codes.name(status), 'revenue': float(revenue), 'orders': int(orders)}
+            for status, revenue, orders in zip(statuses, by_status['revenue'], by_status['orders'])
+        ],
+    }
+
+# Results cached per (from, to, granularity). Order writes mark their dates dirty on the session
+# (mark_orders_changed); once the transaction commits, those days' aggregates and every cached
+# range that covers one of them, including the rolling-window lead-in, are dropped.
+class AnalyticsCache:
+    def __init__(self, max_entries=128, max_age=0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            result = fresh(self._entries, key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def set(self, key, result, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (expiry(self.max_age), result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, dates=None):
+        lead_in = timedelta(days=max(ROLLING_WINDOWS) - 1)
+        with self._lock:
+            self.generation += 1
+            if dates is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                start, end, _ = key
+                if any(start - lead_in <= changed <= end for changed in dates):
+                    del self._entries[key]
+
+analytics_cache = app_service('analytics_cache')
+
+# Record that orders on `order_date` changed in the current transaction (None = unknown dates)
+def mark_orders_changed(order_date=None):
+    dirty = db.session.info.setdefault('analytics_dirty', set())
+    dirty.add(order_date)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_after_commit(session):
+    dirty = session.info.pop('analytics_dirty', None)
+    if dirty:
+        dates = None if None in dirty else dirty
+        day_aggregates.invalidate(dates)
+        analytics_cache.invalidate(dates)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_after_rollback(session):
+    session.info.pop('analytics_dirty', None)
+
+def revenue_analytics(start, end, granularity='day'):
+    key = (start, end, granularity)
+    result = analytics_cache.get(key)
+    if result is None:
+        generation = analytics_cache.generation
+        result = compute_revenue_analytics(start, end, granularity)
+        analytics_cache.set(key, result, generation)
+    return result
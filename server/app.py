@@ -1,31 +1,217 @@
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_bcrypt import Bcrypt
-from config import app, db
-from models import User, MealOption, Menu, Order
-from flask import jsonify, request
-from datetime import datetime, date
-
-# Setup Flask-JWT-Extended and Bcrypt
-jwt = JWTManager(app)
-bcrypt = Bcrypt(app)
-
-@app.before_request
-def create_tables():
+from flask_cors import CORS
+from admission import AdmissionControl
+from analytics import GRANULARITIES, AnalyticsCache, DayAggregates, mark_orders_changed, revenue_analytics
+from archive import ARCHIVE_BATCH_SIZE, archive_orders, order_source, reaches_archive
+from auth import IdentityCache, admin_required, identity_cache, identity_claims
+from compression import compressed
+from database import engine_options, install_sqlite_pragmas
+from idempotency import (
+    IdempotencyConflict, IdempotencyMismatch, IdempotencyStore, idempotency_store, idempotent, sweep_expired_keys
+)
+from config import app_service, db, init_migrate, settings
+from json_provider import FastJSONProvider
+from metrics import RequestMetrics
+from models import User, MealOption, Menu, Order, meal_menu
+from menu_cache import MenuCache
+from orders import (
+    MAX_PAGE_SIZE, bulk_delete, bulk_update_status, order_export_query, order_listing_query, order_page,
+    order_row_to_dict, orders_by_ids, stream_orders_csv, stream_orders_json, stream_orders_ndjson, user_orders_query
+)
+from order_events import OrderEventHub, TooManyStreams, record_order_events
+from order_writer import GroupCommitWriter, OrderWriteTimeout
+from passwords import HasherBusy, PasswordHasher
+from prep_board import prep_board, rebuild_prep_board, record_prep
+from revenue import rebuild_daily_revenue, record_revenue, revenue_by_date
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, stream_with_context
+from sqlalchemy import inspect, select
+from werkzeug.middleware.proxy_fix import ProxyFix
+from datetime import datetime, date, timedelta
+import os
+import time
+import click
+
+jwt = JWTManager()
+# The current app's services (see create_app)
+password_hasher = app_service('password_hasher')
+admission = app_service('admission')
+menu_cache = app_service('menu_cache')
+
+# Routes and CLI commands; cli_group=None keeps the commands at the top level (`flask init-db`)
+bp = Blueprint('api', __name__, cli_group=None)
+
+# Build and configure the app: environment settings (config.settings), then `config` overrides.
+# Used by `flask` (FLASK_APP=app.py finds it), the WSGI server and the benchmarks.
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.update(settings())
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    if not app.config['SECRET_KEY']:
+        # Fine for a single development process; tokens stop working on restart and across workers
+        app.logger.warning('SECRET_KEY is not set; using a random key for this process')
+        app.config['SECRET_KEY'] = os.urandom(24)
+    app.json = FastJSONProvider(app)
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    db.init_app(app)
+    # Only the flask CLI (`flask db ...`) needs Flask-Migrate up front; WSGI servers never load it
+    if click.get_current_context(silent=True) is not None:
+        init_migrate(app)
+    CORS(app)
+    jwt.init_app(app)
     with app.app_context():
-        db.create_all()
-
-@app.route('/')
+        install_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+        # Per-route latency, SQL and response size metrics on /metrics
+        metrics = RequestMetrics(app, db.engine)
+
+    # One instance of each service per app: caches, pools and limiter state are never shared
+    cache_max_age = app.config['CACHE_MAX_AGE_SECONDS']
+    app.extensions['metrics'] = metrics
+    app.extensions['admission'] = AdmissionControl(app, metrics)
+    app.extensions['password_hasher'] = PasswordHasher(
+        Bcrypt(app),
+        rounds=app.config['BCRYPT_LOG_ROUNDS'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_WORKERS'] + app.config['PASSWORD_HASH_QUEUE']
+    )
+    app.extensions['identity_cache'] = IdentityCache(app.config['IDENTITY_CACHE_TTL'])
+    app.extensions['idempotency_store'] = IdempotencyStore(
+        ttl=timedelta(hours=app.config['IDEMPOTENCY_TTL_HOURS']),
+        max_entries=app.config['IDEMPOTENCY_CACHE_SIZE'],
+        lock_seconds=app.config['IDEMPOTENCY_LOCK_SECONDS']
+    )
+    app.extensions['menu_cache'] = MenuCache(app.config['MENU_CACHE_SIZE'], max_age=cache_max_age)
+    app.extensions['order_events'] = OrderEventHub(
+        app,
+        buffer_size=app.config['SSE_BUFFER_SIZE'],
+        history_size=app.config['SSE_HISTORY_SIZE'],
+        max_streams=app.config['SSE_MAX_STREAMS'],
+        poll_seconds=app.config['SSE_POLL_SECONDS'],
+        retention=timedelta(minutes=app.config['SSE_EVENT_RETENTION_MINUTES'])
+    )
+    app.extensions['day_aggregates'] = DayAggregates(max_age=cache_max_age)
+    app.extensions['analytics_cache'] = AnalyticsCache(max_age=cache_max_age)
+    app.extensions['order_writer'] = GroupCommitWriter(
+        app,
+        max_batch=app.config['ORDER_GROUP_COMMIT_MAX_BATCH'],
+        max_wait_ms=app.config['ORDER_GROUP_COMMIT_MAX_WAIT_MS']
+    ) if app.config['ORDER_GROUP_COMMIT'] else None
+
+    app.register_blueprint(bp)
+    return app
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+# Revision matching the schema that the old per-request db.create_all() produced
+INITIAL_REVISION = '68a13edb97d9'
+
+# One-time schema bootstrap: bring the database up to the latest Alembic revision.
+# Runs at startup (or via `flask init-db`) instead of calling db.create_all() on every request.
+def init_db(app):
+    from flask_migrate import stamp, upgrade
+    init_migrate(app)
+    with app.app_context():
+        tables = inspect(db.engine).get_table_names()
+        if 'alembic_version' not in tables and 'orders' in tables:
+            # Database created by db.create_all() before migrations were tracked: adopt it
+            stamp(directory=MIGRATIONS_DIR, revision=INITIAL_REVISION)
+        upgrade(directory=MIGRATIONS_DIR)
+
+@bp.cli.command('init-db')
+def init_db_command():
+    init_db(current_app._get_current_object())
+    print('Database schema is up to date')
+
+@bp.cli.command('rebuild-revenue')
+def rebuild_revenue_command():
+    rebuild_daily_revenue()
+    print('Daily revenue rollup rebuilt')
+
+@bp.cli.command('archive-orders')
+@click.option('--days', default=90, show_default=True, help='Archive finished orders older than this many days.')
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True, help='Orders moved per transaction.')
+def archive_orders_command(days, batch_size):
+    moved = archive_orders(days, batch_size)
+    print(f'Archived {moved} orders')
+
+@bp.cli.command('sweep-idempotency-keys')
+def sweep_idempotency_keys_command():
+    removed = sweep_expired_keys(idempotency_store.ttl)
+    print(f'Removed {removed} expired idempotency keys')
+
+@bp.cli.command('rebuild-prep-board')
+def rebuild_prep_board_command():
+    rebuild_prep_board()
+    print('Prep board counters rebuilt')
+
+# Parse an optional YYYY-MM-DD query parameter; raises ValueError on a malformed date
+def date_arg(name):
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+# Parse an optional non-negative integer query parameter; raises ValueError on anything else
+def int_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    if not value.isdecimal():
+        raise ValueError(f'{name} must be a non-negative whole number')
+    return int(value)
+
+# Serve a menu response from the cache; build() returns (payload, status, meal_ids) on a miss.
+# 200 responses carry a strong ETag so clients can revalidate and get a bodiless 304.
+def cached_menu_response(key, build):
+    entry = menu_cache.get(key)
+    if entry is None:
+        generation = menu_cache.generation
+        payload, status, meal_ids = build()
+        entry = menu_cache.set(key, status, jsonify(payload).get_data(), meal_ids, generation)
+    response = current_app.response_class(entry.body, status=entry.status, mimetype='application/json')
+    if entry.status == 200:
+        response.set_etag(entry.etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response = response.make_conditional(request)
+    return response
+
+# Password hashing pool is full: shed the request instead of queueing it
+@bp.app_errorhandler(HasherBusy)
+def password_hasher_busy(error):
+    return jsonify({'message': 'Server busy, please retry shortly'}), 503, {'Retry-After': str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])}
+
+# Every order stream slot in this process is taken; EventSource retries on its own, and the
+# Retry-After is for clients that reconnect by hand
+@bp.app_errorhandler(TooManyStreams)
+def too_many_streams(error):
+    return jsonify({'message': 'Too many open order streams, please retry shortly'}), 503, {'Retry-After': str(current_app.config['SSE_RETRY_AFTER'])}
+
+# Group-commit batch was not durable in time; the order may still be written
+@bp.app_errorhandler(OrderWriteTimeout)
+def order_write_timeout(error):
+    return jsonify({'message': 'Order is taking longer than expected, please check your orders before retrying'}), 503
+
+# A request with the same Idempotency-Key is still running
+@bp.app_errorhandler(IdempotencyConflict)
+def idempotency_conflict(error):
+    return jsonify({'message': 'A request with this Idempotency-Key is in progress, please retry shortly'}), 409, {'Retry-After': '1'}
+
+@bp.app_errorhandler(IdempotencyMismatch)
+def idempotency_mismatch(error):
+    return jsonify({'message': 'Idempotency-Key was already used for a different request'}), 422
+
+@bp.route('/')
 def index():
     return '<h1>Project Server</h1>'
 
 # User Registration
-@app.route('/api/register', methods=['POST'])
+@bp.route('/api/register', methods=['POST'])
 def register_user():
     data = request.get_json()
     existing_user = User.query.filter((User.username == data['username']) | (User.email == data['email'])).first()
     if existing_user:
         return jsonify({"message": "Username or email already exists"}), 400
-    hashed_password = bcrypt.generate_password_hash(data['password']).decode('utf-8')
+    hashed_password = password_hasher.hash(data['password'])
     is_admin = data.get('is_admin', False)
     new_user = User(username=data['username'], email=data['email'], password_hash=hashed_password, is_admin=is_admin)
     db.session.add(new_user)
@@ -33,12 +219,21 @@ def register_user():
     return jsonify(new_user.serialize()), 201
 
 # User Login
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def login_user():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
-    if user and bcrypt.check_password_hash(user.password_hash, data['password']):
-        access_token = create_access_token(identity=user.id)
+    if user and password_hasher.check(user.password_hash, data['password']):
+        # Upgrade hashes made with a different cost factor while we have the plaintext. This is
+        # best effort: with the hashing pool full the upgrade waits for a later login.
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(data['password'])
+            except HasherBusy:
+                pass
+            else:
+                db.session.commit()
+        access_token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
         return jsonify({
             'token': access_token,
             'is_admin': user.is_admin
@@ -46,13 +241,10 @@ def login_user():
     return jsonify({'message': 'Invalid credentials'}), 401
 
 # Meal Management (Admin Only)
-@app.route('/api/meal-options', methods=['POST'])
-@jwt_required()
+@bp.route('/api/meal-options', methods=['POST'])
+@admin_required
 def create_meal_option():
     data = request.get_json()
-    current_user_id = get_jwt_identity()
-    if not User.query.get(current_user_id).is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
     if not data or 'name' not in data or 'price' not in data:
         return jsonify({'message': 'Invalid input: name and price are required'}), 422
     try:
@@ -73,71 +265,63 @@ def create_meal_option():
         return jsonify({'message': 'Failed to add meal option'}), 422
 
 # Get meal options(Admin only)
-@app.route('/api/meal-options', methods=['GET'])
-@jwt_required()
+@bp.route('/api/meal-options', methods=['GET'])
+@compressed
+@admin_required
 def get_meal_options():
     try:
-        current_user_id = get_jwt_identity()
-        user = db.session.get(User, current_user_id)
-        if not user or not user.is_admin:
-            return jsonify({'message': 'Access forbidden: Admins only'}), 403
-
         meal_options = MealOption.query.all()
         return jsonify([meal.to_dict() for meal in meal_options]), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # Update meal option(Admin only)
-@app.route('/api/meal-options/<int:meal_id>', methods=['PUT'])
-@jwt_required()
+@bp.route('/api/meal-options/<int:meal_id>', methods=['PUT'])
+@admin_required
 def update_meal_option(meal_id):
     try:
         data = request.get_json()
-        current_user_id = get_jwt_identity()
-        if not User.query.get(current_user_id).is_admin:
-            return jsonify({'message': 'Access forbidden: Admins only'}), 403
         meal = MealOption.query.get_or_404(meal_id)
         if 'name' in data:
             meal.name = data['name']
         if 'price' in data:
             meal.price = data['price']
         db.session.commit()
+        menu_cache.invalidate_meal(meal_id)
         return jsonify(meal.to_dict()), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # Delete meal option(Admin only)
-@app.route('/api/meal-options/<int:meal_id>', methods=['DELETE'])
-@jwt_required()
+@bp.route('/api/meal-options/<int:meal_id>', methods=['DELETE'])
+@admin_required
 def delete_meal_option(meal_id):
     try:
-        current_user_id = get_jwt_identity()
-        if not User.query.get(current_user_id).is_admin:
-            return jsonify({'message': 'Access forbidden: Admins only'}), 403
         meal = MealOption.query.get_or_404(meal_id)
         db.session.delete(meal)
         db.session.commit()
+        menu_cache.invalidate_meal(meal_id)
         return jsonify({"message": "Meal option deleted successfully"}), 200
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 # Menu Management (Admin Only)
-@app.route('/api/menus/setDaily', methods=['POST'])
+@bp.route('/api/menus/setDaily', methods=['POST'])
 @jwt_required()
 def update_daily_menu():
     data = request.json
     date_str = data.get('date')
     meal_ids = data.get('meal_ids', [])
 
-    app.logger.info(f"Received date: {date_str}")
-    app.logger.info(f"Received meal_ids: {meal_ids}")
+    current_app.logger.info(f"Received date: {date_str}")
+    current_app.logger.info(f"Received meal_ids: {meal_ids}")
 
     if not date_str:
         return {'message': 'Date is required'}, 400
 
     try:
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        app.logger.info(f"Parsed date: {date}")
+        current_app.logger.info(f"Parsed date: {date}")
     except ValueError:
         return {'message': 'Invalid date format'}, 400
 
@@ -147,34 +331,37 @@ def update_daily_menu():
         db.session.add(menu)
 
     meal_options = MealOption.query.filter(MealOption.id.in_(meal_ids)).all()
-    app.logger.info(f"Meal options found: {[meal.id for meal in meal_options]}")
+    current_app.logger.info(f"Meal options found: {[meal.id for meal in meal_options]}")
 
     menu.meal_options = meal_options
     db.session.commit()
+    menu_cache.invalidate_date(date)
 
     return {'message': 'Menu updated successfully'}, 200
 
 # Get daily menu
-@app.route('/api/menus/today', methods=['GET'])
+@bp.route('/api/menus/today', methods=['GET'])
+@compressed
 @jwt_required()
 def get_daily_menu():
     try:
         today = datetime.now().date()
-        app.logger.info(f"Fetching menu for date: {today}")
-        menu = Menu.query.filter_by(date=today).first()
 
-        if menu is None:
-            return jsonify([]), 200
+        def build():
+            current_app.logger.info(f"Fetching menu for date: {today}")
+            menu = Menu.query.filter_by(date=today).first()
+            if menu is None:
+                return [], 200, ()
+            return [meal_option.to_dict() for meal_option in menu.meal_options], 200, [meal.id for meal in menu.meal_options]
 
-        meals = [meal_option.to_dict() for meal_option in menu.meal_options]
-        return jsonify(meals), 200
+        return cached_menu_response(('today', today), build)
 
     except Exception as e:
-        app.logger.error(f"Error fetching daily menu: {str(e)}")
+        current_app.logger.error(f"Error fetching daily menu: {str(e)}")
         return jsonify({"error": "An error occurred while fetching the daily menu"}), 500
 
 # Remove a meal from menu
-@app.route('/api/menus/removeMeal/<int:meal_id>', methods=['DELETE'])
+@bp.route('/api/menus/removeMeal/<int:meal_id>', methods=['DELETE'])
 @jwt_required()
 def remove_meal_from_menu(meal_id):
     try:
@@ -189,6 +376,7 @@ def remove_meal_from_menu(meal_id):
         if meal_option in menu.meal_options:
             menu.meal_options.remove(meal_option)
             db.session.commit()
+            menu_cache.invalidate_date(menu.date)
             return jsonify({'message': 'Meal removed from menu'}), 200
         else:
             return jsonify({'message': 'Meal not in menu'}), 404
@@ -197,175 +385,336 @@ def remove_meal_from_menu(meal_id):
 
 
 # Retrieve Menu (Customer)
-@app.route('/api/menus/<date>', methods=['GET'])
-@app.route('/api/menus/<date>', methods=['GET'])
+@bp.route('/api/menus/<date>', methods=['GET'])
+@bp.route('/api/menus/<date>', methods=['GET'])
+@compressed
 @jwt_required()
 def get_menu(date):
     menu_date = datetime.strptime(date, '%Y-%m-%d').date()
-    menu = Menu.query.filter_by(date=menu_date).first()
-    if not menu:
-        return jsonify({'message': 'No menu found for this date'}), 404
-    meal_options = [meal.to_dict() for meal in menu.meal_options]
-    return jsonify({'date': date, 'meal_options': meal_options}), 200
+
+    def build():
+        menu = Menu.query.filter_by(date=menu_date).first()
+        if not menu:
+            return {'message': 'No menu found for this date'}, 404, ()
+        meal_options = [meal.to_dict() for meal in menu.meal_options]
+        return {'date': str(menu_date), 'meal_options': meal_options}, 200, [meal['id'] for meal in meal_options]
+
+    return cached_menu_response(('date', menu_date), build)
+
+# Retrieve the menus for a date range (Customer): ?from=YYYY-MM-DD&to=YYYY-MM-DD.
+# One joined query; each meal appears once under `meals`, and `days` maps a date to its meal ids.
+@bp.route('/api/menus', methods=['GET'])
+@compressed
+@jwt_required()
+def get_menus_in_range():
+    try:
+        start = date_arg('from')
+        end = date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    if not start or not end:
+        return jsonify({'message': 'from and to are required'}), 400
+    if start > end:
+        return jsonify({'message': 'from must not be after to'}), 400
+    if (end - start).days >= current_app.config['MENU_RANGE_MAX_DAYS']:
+        return jsonify({'message': f"Range is limited to {current_app.config['MENU_RANGE_MAX_DAYS']} days"}), 400
+
+    def build():
+        rows = db.session.execute(
+            select(Menu.date, MealOption.id, MealOption.name, MealOption.price)
+            .select_from(Menu)
+            .outerjoin(meal_menu, meal_menu.c.menu_id == Menu.id)
+            .outerjoin(MealOption, MealOption.id == meal_menu.c.meal_option_id)
+            .where(Menu.date >= start, Menu.date <= end)
+            .order_by(Menu.date, MealOption.id)
+        ).all()
+        meals = {}
+        days = {}
+        for menu_date, meal_id, name, price in rows:
+            meal_ids = days.setdefault(str(menu_date), [])
+            if meal_id is not None:
+                meal_ids.append(meal_id)
+                meals[str(meal_id)] = {'id': meal_id, 'name': name, 'price': price}
+        return {'from': str(start), 'to': str(end), 'meals': meals, 'days': days}, 200, [int(meal_id) for meal_id in meals]
+
+    return cached_menu_response(('range', (start, end)), build)
 
 # Order Management (Customer)
-@app.route('/api/orders', methods=['POST'])
+@bp.route('/api/orders', methods=['POST'])
 @jwt_required()
+@idempotent
 def place_order():
     data = request.get_json()
     current_user_id = get_jwt_identity()
     meal_id = data.get('meal_option_id')
     quantity = data.get('quantity')
-    order = Order(user_id=current_user_id, meal_option_id=meal_id, quantity=quantity)
+    meal = db.session.get(MealOption, meal_id)
+    if not meal:
+        return jsonify({'message': 'Meal option not found'}), 404
+    order = Order(user_id=current_user_id, meal_option_id=meal_id, quantity=quantity, date=datetime.utcnow().date(), status='Pending')
+    order.set_price(meal.price)
+
+    order_writer = current_app.extensions['order_writer']
+    if order_writer is not None:
+        # The writer thread owns the order from here; build the response from values we already have
+        total_price = order.total_price
+        order_id = order_writer.submit(order)
+        user = identity_cache.get(current_user_id)
+        return jsonify({
+            'id': order_id,
+            'user': user['username'] if user else None,
+            'meal': meal.name,
+            'quantity': quantity,
+            'totalPrice': total_price,
+            'status': 'Pending'
+        }), 201
+
     db.session.add(order)
+    record_revenue(order.date, order.total_price, 1)
+    record_prep(order.date, meal_id, order.status, quantity, 1, order.total_price)
     db.session.commit()
     return jsonify(order.to_dict()), 201
 
 # Update an existing order
-@app.route('/api/orders/<int:order_id>', methods=['PUT'])
+@bp.route('/api/orders/<int:order_id>', methods=['PUT'])
 @jwt_required()
 def update_order(order_id):
     data = request.get_json()
     order = Order.query.get_or_404(order_id)
     if order.user_id != get_jwt_identity():
         return jsonify({'message': 'Access forbidden: You do not own this order'}), 403
-    order.meal_option_id = data.get('meal_option_id', order.meal_option_id)
+    old_total = order.total_price
+    old_meal_id, old_quantity = order.meal_option_id, order.quantity
+    unit_price = order.unit_price
+    meal_id = data.get('meal_option_id', order.meal_option_id)
+    if meal_id != order.meal_option_id:
+        meal = db.session.get(MealOption, meal_id)
+        if not meal:
+            return jsonify({'message': 'Meal option not found'}), 404
+        order.meal_option_id = meal_id
+        unit_price = meal.price
     order.quantity = data.get('quantity', order.quantity)
+    order.set_price(unit_price)
+    # Analytics break revenue down by meal, so the day changes even when its revenue does not
+    mark_orders_changed(order.date)
+    record_revenue(order.date, order.total_price - old_total, 0)
+    if order.meal_option_id == old_meal_id:
+        record_prep(order.date, old_meal_id, order.status, order.quantity - old_quantity, 0, order.total_price - old_total)
+    else:
+        record_prep(order.date, old_meal_id, order.status, -old_quantity, -1, -old_total)
+        record_prep(order.date, order.meal_option_id, order.status, order.quantity, 1, order.total_price)
     db.session.commit()
     return jsonify(order.to_dict()), 200
 
 # Get all orders for the authenticated user
-@app.route('/api/orders', methods=['GET'])
+@bp.route('/api/orders', methods=['GET'])
+@compressed
 @jwt_required()
 def get_orders():
     current_user_id = get_jwt_identity()
-    orders = Order.query.filter_by(user_id=current_user_id).all()
+    try:
+        start = date_arg('from')
+        end = date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    # Select only the columns we need in one joined query instead of lazy-loading meal_option per order;
+    # archived orders are included only when the range reaches back to them
+    source = order_source(reaches_archive(start))
+    orders = db.session.execute(user_orders_query(current_user_id, start, end, source)).all()
     orders_with_meal_details = []
-    for order in orders:
-        meal = order.meal_option
+    for order_id, meal_name, meal_price, quantity, status, total_price in orders:
         orders_with_meal_details.append({
-            'id': order.id,
-            'meal_name': meal.name,
-            'meal_price': meal.price,
-            'quantity': order.quantity,
-            'status': order.status,
-            'total_price': meal.price * order.quantity
+            'id': order_id,
+            'meal_name': meal_name,
+            'meal_price': meal_price,
+            'quantity': quantity,
+            'status': status,
+            'total_price': total_price
         })
 
     return jsonify({'orders': orders_with_meal_details}), 200
 
+# Stream the authenticated user's order status changes as Server-Sent Events.
+# EventSource cannot set headers, so the token may also be passed as ?jwt=<token>.
+@bp.route('/api/orders/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_orders():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    # The generator runs after the app context is gone, so it keeps its own references to what it
+    # needs; the request's database session is released as soon as this view returns
+    hub = current_app.extensions['order_events']
+    json = current_app.json
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+    lifetime = current_app.config['SSE_MAX_LIFETIME_SECONDS']
+    subscription = hub.subscribe(
+        get_jwt_identity(),
+        int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    )
+
+    # Ends after `lifetime` seconds; the client reconnects with Last-Event-ID, to this or any other
+    # process, and is either replayed what it missed or told to resync
+    def events():
+        deadline = time.monotonic() + lifetime
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            pending = subscription.wait(min(heartbeat, deadline - time.monotonic()))
+            if not pending:
+                yield ': heartbeat\n\n'
+            for event in pending:
+                event_id = f'id: {event.id}\n' if event.id is not None else ''
+                yield f'{event_id}event: {event.name}\ndata: {json.dumps(event.data)}\n\n'
+
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # The server closes every response, even one it never started sending, so the stream's slot
+    # is always given back
+    response.call_on_close(lambda: hub.unsubscribe(subscription))
+    return response
+
 # Delete an existing order
-@app.route('/api/orders/<int:order_id>', methods=['DELETE'])
+@bp.route('/api/orders/<int:order_id>', methods=['DELETE'])
 @jwt_required()
 def delete_order(order_id):
     order = Order.query.get_or_404(order_id)
     if order.user_id != get_jwt_identity():
         return jsonify({'message': 'Access forbidden: You do not own this order'}), 403
+    record_revenue(order.date, -order.total_price, -1)
+    record_prep(order.date, order.meal_option_id, order.status, -order.quantity, -1, -order.total_price)
     db.session.delete(order)
     db.session.commit()
     return jsonify({'message': 'Order deleted'}), 200
 
 # Order Management (Admin only)
 # Get all orders
-@app.route('/api/orders/admin', methods=['GET'])
-@jwt_required()
+@bp.route('/api/orders/admin', methods=['GET'])
+@compressed
+@admin_required
 def get_all_orders():
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
+    try:
+        on_date = date_arg('date')
+        start = on_date or date_arg('from')
+        end = on_date or date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    try:
+        after = int_arg('after')
+        limit = int_arg('limit')
+    except ValueError as error:
+        return jsonify({'message': str(error)}), 400
+    query = order_listing_query(status=request.args.get('status'), start=start, end=end, after=after)
+
+    # Streaming mode: constant memory regardless of table size
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return Response(stream_with_context(stream_orders_json(query)), mimetype='application/json')
+
+    # Keyset pagination on orders.id: ?limit=N&after=<next_cursor>
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        orders, next_cursor = order_page(query, limit)
+        return jsonify({'orders': orders, 'next_cursor': next_cursor}), 200
+
+    orders = db.session.execute(query).all()
+    return jsonify({'orders': [order_row_to_dict(order) for order in orders]}), 200
+
+
+# Export orders for accounting as CSV or NDJSON, streamed from a server-side cursor (Admin only)
+EXPORT_FORMATS = {
+    'csv': (stream_orders_csv, 'text/csv'),
+    'ndjson': (stream_orders_ndjson, 'application/x-ndjson'),
+}
+
+@bp.route('/api/orders/export', methods=['GET'])
+@compressed
+@admin_required
+def export_orders():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': f"Invalid format, expected one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        start = date_arg('from')
+        end = date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
 
-    orders = Order.query.all()
-    return jsonify({'orders': [order.to_dict() for order in orders]}), 200
+    stream, mimetype = EXPORT_FORMATS[export_format]
+    source = order_source(reaches_archive(start))
+    chunks = stream(order_export_query(status=request.args.get('status'), start=start, end=end, orders=source))
+    filename = f"orders-{start or 'all'}-{end or date.today()}.{export_format}"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 
 # Update Order status(Admin only)
-@app.route('/api/orders/<int:order_id>/status', methods=['PUT'])
-@jwt_required()
+@bp.route('/api/orders/<int:order_id>/status', methods=['PUT'])
+@admin_required
 def update_order_status(order_id):
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
-
     data = request.get_json()
     order = db.session.get(Order, order_id)
     if not order:
         return jsonify({'message': 'Order not found'}), 404
 
     new_status = data.get('status')
-    if new_status:
+    # Setting the status an order already has changes nothing, so nobody is told about it
+    if new_status and new_status != order.status:
+        record_prep(order.date, order.meal_option_id, order.status, -order.quantity, -1, -order.total_price)
+        record_prep(order.date, order.meal_option_id, new_status, order.quantity, 1, order.total_price)
         order.status = new_status
+        mark_orders_changed(order.date)
+        record_order_events([(order.user_id, 'order_status', {'id': order.id, 'status': new_status})])
     db.session.commit()
     return jsonify(order.to_dict()), 200
 
 
 # Delete Order status(Admin only)
-@app.route('/api/orders/admin', methods=['DELETE'])
-@jwt_required()
+@bp.route('/api/orders/admin', methods=['DELETE'])
+@admin_required
+@idempotent
 def bulk_delete_orders():
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
-
     data = request.get_json()
-    for order_id in data['order_ids']:
-        order = db.session.get(Order, order_id)
-        if order:
-            db.session.delete(order)
+    deleted = bulk_delete(data['order_ids'])
     db.session.commit()
 
-    return jsonify({'message': 'Orders deleted'}), 200
+    return jsonify({'message': 'Orders deleted', 'deleted': deleted}), 200
 
 
 # Update all orders (Admin only)
-@app.route('/api/orders/status', methods=['PUT'])
-@jwt_required()
+@bp.route('/api/orders/status', methods=['PUT'])
+@admin_required
+@idempotent
 def bulk_update_order_status():
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
-
     data = request.get_json()
-    for order_data in data:
-        order = db.session.get(Order, order_data['order_id'])
-        if order:
-            order.status = order_data.get('status', order.status)
+    # Later entries win if the same order appears twice, as with the old per-row loop
+    statuses = {order_data['order_id']: order_data['status'] for order_data in data if order_data.get('status')}
+    updated, changes = bulk_update_status(statuses)
+    record_order_events([
+        (user_id, 'order_status', {'id': order_id, 'status': status}) for order_id, user_id, status in changes
+    ])
     db.session.commit()
-    updated_orders = [order.to_dict() for order in Order.query.filter(Order.id.in_([d['order_id'] for d in data])).all()]
-    return jsonify(updated_orders), 200
+
+    response = {'message': 'Orders updated', 'updated': updated}
+    # Reloading the orders is opt-in: ?include_orders=true
+    if request.args.get('include_orders', '').lower() in ('1', 'true'):
+        response['orders'] = orders_by_ids([order_data['order_id'] for order_data in data])
+    return jsonify(response), 200
 
 
 # Revenue Tracking (Admin Only)
-@app.route('/api/revenue', methods=['GET'])
-@jwt_required()
+@bp.route('/api/revenue', methods=['GET'])
+@compressed
+@admin_required
 def track_revenue():
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if not user or not user.is_admin:
-        return jsonify({'message': 'Access forbidden: Admins only'}), 403
+    try:
+        start = date_arg('from')
+        end = date_arg('to')
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
 
     today = date.today()
-    orders_today = db.session.query(Order).filter_by(date=today).all()
-    total_revenue_today = sum(order.total_price for order in orders_today)
-    revenue_data = []
-    orders = db.session.query(Order).all()
-    date_to_revenue = {}
-    for order in orders:
-        order_date = order.date.strftime('%Y-%m-%d')
-        if order_date not in date_to_revenue:
-            date_to_revenue[order_date] = {'totalRevenue': 0, 'orderCount': 0}
-        date_to_revenue[order_date]['totalRevenue'] += order.total_price
-        date_to_revenue[order_date]['orderCount'] += 1
-
-    for date_str, data in date_to_revenue.items():
-        revenue_data.append({
-            'date': date_str,
-            'totalRevenue': data['totalRevenue'],
-            'orderCount': data['orderCount']
-        })
+    today_rows = revenue_by_date(today, today)
+    total_revenue_today = today_rows[0].total_revenue if today_rows else 0
+    revenue_data = [row.to_dict() for row in revenue_by_date(start, end)]
 
     return jsonify({
         'date': str(today),
@@ -374,6 +723,51 @@ def track_revenue():
     }), 200
 
 
+# Revenue analytics: per-period series, 7/30-day rolling averages, per-meal and per-status breakdowns (Admin Only)
+@bp.route('/api/revenue/analytics', methods=['GET'])
+@compressed
+@admin_required
+def revenue_analytics_report():
+    try:
+        end = date_arg('to') or date.today()
+        start = date_arg('from') or end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'message': f"Invalid granularity, expected one of: {', '.join(GRANULARITIES)}"}), 400
+    if start > end:
+        return jsonify({'message': 'from must not be after to'}), 400
+    if (end - start).days >= current_app.config['ANALYTICS_MAX_DAYS']:
+        return jsonify({'message': f"Range is limited to {current_app.config['ANALYTICS_MAX_DAYS']} days"}), 400
+
+    return jsonify(revenue_analytics(start, end, granularity)), 200
+
+
+# Kitchen prep board: quantities per meal still to cook for a day, read from the prep counters.
+# Cheap enough to poll; unchanged boards revalidate to a bodiless 304.
+@bp.route('/api/prep-board', methods=['GET'])
+@admin_required
+def get_prep_board():
+    try:
+        on_date = date_arg('date') or date.today()
+    except ValueError:
+        return jsonify({'message': 'Invalid date format, expected YYYY-MM-DD'}), 400
+    response = jsonify(prep_board(on_date))
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+
+# Admission control state: limits, requests in progress, rejections and the most throttled callers (Admin only)
+@bp.route('/api/admin/limiter', methods=['GET'])
+@admin_required
+def get_limiter_state():
+    return jsonify(admission.state()), 200
+
 
+# Development server; production runs under gunicorn (wsgi.py, gunicorn.conf.py)
 if __name__ == '__main__':
+    app = create_app()
+    init_db(app)
     app.run(port=5555, debug=True)
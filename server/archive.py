@@ -0,0 +1,59 @@
+from datetime import date, datetime, timedelta
+
+from config import db
+from models import ArchivedOrder, Order
+from sqlalchemy import delete, func, insert, literal, select, union_all
+
+# Orders in these statuses will not change again and can be archived
+ARCHIVABLE_STATUSES = ('Completed', 'Cancelled')
+# Orders moved per transaction
+ARCHIVE_BATCH_SIZE = 1000
+# Columns shared by orders and orders_archive
+ORDER_COLUMNS = ('id', 'user_id', 'meal_option_id', 'date', 'quantity', 'unit_price', 'total_price', 'status')
+
+# Latest order date in the archive, or None while it is empty (one index lookup)
+def archived_through():
+    return db.session.scalar(select(func.max(ArchivedOrder.date)))
+
+# Whether a read starting at `start` (None = from the beginning) needs the archive
+def reaches_archive(start=None):
+    through = archived_through()
+    return through is not None and (start is None or start <= through)
+
+# The table order reads select from: `orders`, or orders UNION ALL orders_archive under the same
+# column names. Date and user filters applied to it are pushed into both branches by the database.
+def order_source(include_archive=False):
+    if not include_archive:
+        return Order.__table__
+    return union_all(
+        select(*(Order.__table__.c[name] for name in ORDER_COLUMNS)),
+        select(*(ArchivedOrder.__table__.c[name] for name in ORDER_COLUMNS)),
+    ).subquery('all_orders')
+
+# Move finished orders dated before today - `older_than_days` into orders_archive, `batch_size`
+# orders per transaction, so the live table stays small. Rollups (daily_revenue, prep_counts)
+# already include these orders and are left as they are. Returns the number of orders moved.
+def archive_orders(older_than_days, batch_size=ARCHIVE_BATCH_SIZE):
+    cutoff = date.today() - timedelta(days=older_than_days)
+    archivable = (Order.date < cutoff, Order.status.in_(ARCHIVABLE_STATUSES))
+    moved = 0
+    after = 0
+    while True:
+        # Batches are id ranges rather than IN lists, so batch_size is not bound by parameter limits
+        last_id = db.session.scalar(
+            select(Order.id).where(*archivable, Order.id > after).order_by(Order.id).offset(batch_size - 1).limit(1)
+        ) or db.session.scalar(select(func.max(Order.id)).where(*archivable, Order.id > after))
+        if last_id is None:
+            return moved
+        batch = (*archivable, Order.id > after, Order.id <= last_id)
+        db.session.execute(
+            insert(ArchivedOrder).from_select(
+                [*ORDER_COLUMNS, 'archived_at'],
+                select(*(Order.__table__.c[name] for name in ORDER_COLUMNS), literal(datetime.utcnow(), ArchivedOrder.archived_at.type))
+                .where(*batch)
+            )
+        )
+        result = db.session.execute(delete(Order).where(*batch), execution_options={'synchronize_session': False})
+        db.session.commit()
+        moved += result.rowcount
+        after = last_id
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from config import app_service, db
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from models import User
+
+# Small TTL-bounded cache of user snapshots (plain dicts, never ORM objects) keyed by user id
+class IdentityCache:
+    def __init__(self, ttl=60, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        user = db.session.get(User, user_id)
+        snapshot = user.serialize() if user else None
+        if snapshot is not None and self.ttl > 0:
+            with self._lock:
+                self._entries[user_id] = (now + self.ttl, snapshot)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+identity_cache = app_service('identity_cache')
+
+# Claims embedded in every access token by login_user
+def identity_claims(user):
+    return {'is_admin': bool(user.is_admin)}
+
+# jwt_required() plus an admin check read from the token's claims, without a database query.
+# Tokens issued before the claim existed fall back to the identity cache.
+def admin_required(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        is_admin = get_jwt().get('is_admin')
+        if is_admin is None:
+            user = identity_cache.get(get_jwt_identity())
+            is_admin = bool(user and user['is_admin'])
+        if not is_admin:
+            return jsonify({'message': 'Access forbidden: Admins only'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,85 @@
+# Benchmark suite for the Mealy API.
+# Usage (from server/): python -m benchmarks [--orders N] [--server] [--save report.json] [--baseline report.json]
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Seed a scratch database and benchmark the API endpoints.')
+    parser.add_argument('--database', help='SQLite file to seed/reuse (default: a temporary scratch database)')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--meals', type=int, default=40)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--login-requests', type=int, default=20, help='requests for the (bcrypt-bound) login endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per endpoint')
+    parser.add_argument('--endpoints', help='comma-separated subset of endpoints to run')
+    parser.add_argument('--server', action='store_true', help='drive a local threaded WSGI server instead of the test client')
+    parser.add_argument('--save', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='compare against a previously saved JSON report')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.database:
+        os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(args.database)}'
+
+    from benchmarks.common import cleanup
+    from benchmarks.runner import ServerDriver, TestClientDriver, compare, run_scenario, scenarios
+    from benchmarks.seed import seed
+    from app import create_app, db, init_db, password_hasher
+    from auth import identity_claims
+    from flask_jwt_extended import create_access_token
+    from models import MealOption, User
+    from sqlalchemy import select
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        start = time.perf_counter()
+        seeded = seed(password_hasher, users=args.users, meals=args.meals, days=args.days, orders=args.orders)
+        seed_seconds = time.perf_counter() - start
+        users = db.session.scalars(select(User).order_by(User.id)).all()
+        tokens = [create_access_token(identity=user.id, additional_claims=identity_claims(user)) for user in users if not user.is_admin]
+        admin_token = next(create_access_token(identity=user.id, additional_claims=identity_claims(user)) for user in users if user.is_admin)
+        meal_ids = db.session.scalars(select(MealOption.id)).all()
+        engine = db.engine
+
+    driver = ServerDriver(app) if args.server else TestClientDriver(app)
+    selected = scenarios(tokens, admin_token, meal_ids)
+    if args.endpoints:
+        selected = {name: selected[name] for name in args.endpoints.split(',')}
+    endpoints = {}
+    for name, build in selected.items():
+        requests = args.login_requests if name == 'login' else args.requests
+        endpoints[name] = run_scenario(driver, engine, build, requests, args.concurrency)
+        print(f'{name:<22}p50 {endpoints[name]["p50_ms"]:>9.2f}ms  p99 {endpoints[name]["p99_ms"]:>9.2f}ms  '
+              f'{endpoints[name]["throughput_rps"]:>8.1f} req/s  {endpoints[name]["sql_per_request"]:>5.1f} SQL/req', file=sys.stderr)
+    driver.close()
+    engine.dispose()
+    if not args.database:
+        cleanup()
+
+    report = {
+        'driver': 'server' if args.server else 'test_client',
+        'concurrency': args.concurrency,
+        'dataset': {'users': args.users, 'meals': args.meals, 'days': args.days, 'orders': args.orders,
+                    'seeded_seconds': round(seed_seconds, 1) if seeded else None},
+        'endpoints': endpoints,
+    }
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report['vs_baseline_percent'] = compare(report, json.load(baseline))
+    if args.save:
+        with open(args.save, 'w') as output:
+            json.dump(report, output, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
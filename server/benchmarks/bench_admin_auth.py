@@ -0,0 +1,58 @@
+# Benchmark: SQL statements and latency per admin request, comparing
+#   - tokens carrying the is_admin claim (no lookup),
+#   - legacy tokens without the claim (identity cache fallback),
+#   - legacy tokens with the cache disabled (one user query per request, as before).
+# Usage (from server/): python -m benchmarks.bench_admin_auth [requests]
+import sys
+import time
+
+from benchmarks.common import cleanup, count_statements
+from app import create_app, db
+from auth import identity_claims
+from flask_jwt_extended import create_access_token
+from models import MealOption, User
+
+app = create_app()
+
+ENDPOINT = '/api/meal-options'
+
+
+def run(client, engine, token, requests):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get(ENDPOINT, headers=headers)
+    with count_statements(engine) as statements:
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert client.get(ENDPOINT, headers=headers).status_code == 200
+        elapsed = time.perf_counter() - start
+    return elapsed / requests * 1e6, statements.count / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', password_hash='x', is_admin=True)
+        db.session.add(admin)
+        db.session.add_all(MealOption(name=f'Meal {i}', price=i + 1) for i in range(10))
+        db.session.commit()
+        claim_token = create_access_token(identity=admin.id, additional_claims=identity_claims(admin))
+        legacy_token = create_access_token(identity=admin.id)
+        engine = db.engine
+    client = app.test_client()
+
+    results = [('is_admin claim', run(client, engine, claim_token, requests))]
+    results.append(('legacy token, cached', run(client, engine, legacy_token, requests)))
+    app.extensions['identity_cache'].ttl = 0
+    app.extensions['identity_cache'].invalidate(admin.id)
+    results.append(('legacy token, no cache', run(client, engine, legacy_token, requests)))
+    engine.dispose()
+    cleanup()
+
+    print(f'{"mode":<26}{"us/request":>12}{"SQL/request":>14}')
+    for name, (latency, statements) in results:
+        print(f'{name:<26}{latency:>12.1f}{statements:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
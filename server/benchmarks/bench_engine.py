@@ -0,0 +1,96 @@
+# Benchmark: concurrent order writers and readers against SQLite, comparing the old default
+# engine (rollback journal, default pragmas) with the configuration from database.py.
+# Usage (from server/): python -m benchmarks.bench_engine [seconds] [writers] [readers]
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date
+
+from benchmarks.common import SCRATCH_DIR, cleanup
+from config import db
+from database import engine_options, install_sqlite_pragmas, sqlite_pragmas
+from models import MealOption, Order, User
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+
+def build_engine(name, configured):
+    url = f'sqlite:///{os.path.join(SCRATCH_DIR, name)}.db'
+    if not configured:
+        return create_engine(url)
+    engine = create_engine(url, **engine_options(url))
+    install_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{'username': 'u', 'email': 'u@example.com', 'password_hash': 'x'}])
+        connection.execute(insert(MealOption), [{'name': f'Meal {i}', 'price': i + 1} for i in range(10)])
+        connection.execute(insert(Order), [
+            {'user_id': 1, 'meal_option_id': i % 10 + 1, 'quantity': 1, 'unit_price': i % 10 + 1,
+             'total_price': i % 10 + 1, 'date': date.today(), 'status': 'Pending'}
+            for i in range(10000)
+        ])
+
+
+def writer(engine, stop, stats):
+    while not stop.is_set():
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(Order).values(
+                    user_id=1, meal_option_id=1, quantity=1, unit_price=1, total_price=1, date=date.today(), status='Pending'
+                ))
+            stats['writes'] += 1
+        except OperationalError:
+            stats['locked'] += 1
+
+
+def reader(engine, stop, stats):
+    query = select(func.count(Order.id)).where(Order.user_id == 1, Order.status == 'Pending')
+    while not stop.is_set():
+        try:
+            with engine.connect() as connection:
+                connection.execute(query).scalar()
+            stats['reads'] += 1
+        except OperationalError:
+            stats['locked'] += 1
+
+
+def run(engine, seconds, writers, readers):
+    seed(engine)
+    stop = threading.Event()
+    stats = {'writes': 0, 'reads': 0, 'locked': 0}
+    threads = [threading.Thread(target=writer, args=(engine, stop, stats)) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, args=(engine, stop, stats)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    return {
+        'writes_per_s': round(stats['writes'] / seconds, 1),
+        'reads_per_s': round(stats['reads'] / seconds, 1),
+        'locked_errors': stats['locked'],
+    }
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    results = {
+        'default': run(build_engine('default', configured=False), seconds, writers, readers),
+        'configured': run(build_engine('configured', configured=True), seconds, writers, readers),
+    }
+    cleanup()
+    print(json.dumps({'writers': writers, 'readers': readers, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Benchmark: POST /api/orders throughput with one commit per request vs. group commit.
+# Runs the app under a local threaded WSGI server with concurrent clients.
+# Usage (from server/): python -m benchmarks.bench_group_commit [seconds] [clients]
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import cleanup
+from app import create_app, db
+from auth import identity_claims
+from flask_jwt_extended import create_access_token
+from models import MealOption, User
+from order_writer import GroupCommitWriter
+from werkzeug.serving import make_server
+
+app = create_app()
+
+
+def place_orders(base_url, token, stop, latencies, errors):
+    body = json.dumps({'meal_option_id': 1, 'quantity': 1}).encode()
+    headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {token}'}
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(base_url + '/api/orders', data=body, headers=headers)) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except urllib.error.HTTPError:
+            errors.append(1)
+
+
+def phase(base_url, tokens, seconds):
+    stop = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=place_orders, args=(base_url, token, stop, latencies, errors)) for token in tokens]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        'orders_per_s': round(len(latencies) / seconds, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'errors': len(errors),
+    }
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with app.app_context():
+        db.create_all()
+        users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='x') for i in range(clients)]
+        db.session.add_all(users)
+        db.session.add(MealOption(name='Meal', price=5))
+        db.session.commit()
+        tokens = [create_access_token(identity=user.id, additional_claims=identity_claims(user)) for user in users]
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    http_server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{http_server.server_port}'
+
+    app.extensions['order_writer'] = None
+    per_request = phase(base_url, tokens, seconds)
+    app.extensions['order_writer'] = GroupCommitWriter(
+        app,
+        max_batch=app.config['ORDER_GROUP_COMMIT_MAX_BATCH'],
+        max_wait_ms=app.config['ORDER_GROUP_COMMIT_MAX_WAIT_MS']
+    )
+    group_commit = phase(base_url, tokens, seconds)
+    http_server.shutdown()
+    cleanup()
+
+    print(json.dumps({
+        'clients': clients,
+        'synchronous': app.config['SQLITE_PRAGMAS']['synchronous'],
+        'per_request_commit': per_request,
+        'group_commit': group_commit,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
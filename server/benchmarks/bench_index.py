@@ -0,0 +1,52 @@
+# Micro-benchmark: per-request overhead of the old `db.create_all()` before_request hook.
+# Usage (from server/): python -m benchmarks.bench_index [requests]
+import sys
+import time
+
+from benchmarks.common import cleanup, count_statements
+from app import create_app, db
+
+app = create_app()
+
+
+# Re-creates the removed hook; toggled on for the second run
+legacy_hook = {'enabled': False}
+
+
+@app.before_request
+def create_tables():
+    if legacy_hook['enabled']:
+        db.create_all()
+
+
+def run(client, engine, requests):
+    for _ in range(50):
+        client.get('/')
+    with count_statements(engine) as statements:
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get('/')
+        elapsed = time.perf_counter() - start
+    return elapsed / requests * 1e6, statements.count / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with app.app_context():
+        db.create_all()
+        engine = db.engine
+    client = app.test_client()
+
+    current = run(client, engine, requests)
+    legacy_hook['enabled'] = True
+    per_request_create_all = run(client, engine, requests)
+    engine.dispose()
+    cleanup()
+
+    print(f'{"mode":<28}{"us/request":>12}{"SQL/request":>14}')
+    print(f'{"init_db at startup":<28}{current[0]:>12.1f}{current[1]:>14.1f}')
+    print(f'{"create_all per request":<28}{per_request_create_all[0]:>12.1f}{per_request_create_all[1]:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
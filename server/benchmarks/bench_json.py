@@ -0,0 +1,77 @@
+# Benchmark: encode time and bytes on the wire for a large order list, comparing
+#   - the old pretty-printed stdlib provider (app.json.compact = False),
+#   - the stdlib encoder with compact separators (the fallback without orjson),
+#   - the configured provider (orjson when installed),
+# then GET /api/orders/admin with identity, gzip and brotli encodings.
+# Usage (from server/): python -m benchmarks.bench_json [orders] [repeats]
+import json
+import sys
+import time
+
+from benchmarks.common import cleanup
+from benchmarks.seed import seed
+from app import create_app, db, init_db, password_hasher
+from auth import identity_claims
+from flask.json.provider import DefaultJSONProvider
+from flask_jwt_extended import create_access_token
+from json_provider import orjson
+from models import User
+from orders import order_listing_query, order_row_to_dict
+from sqlalchemy import select
+
+app = create_app()
+
+ENDPOINT = '/api/orders/admin'
+
+
+def time_encode(encode, payload, repeats):
+    body = encode(payload)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        encode(payload)
+    return {'ms': round((time.perf_counter() - start) / repeats * 1000, 2), 'bytes': len(body)}
+
+
+def time_request(client, headers, repeats):
+    response = client.get(ENDPOINT, headers=headers)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        assert client.get(ENDPOINT, headers=headers).status_code == 200
+    return {'ms': round((time.perf_counter() - start) / repeats * 1000, 2), 'bytes': len(response.data)}
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    init_db(app)
+    with app.app_context():
+        seed(password_hasher, users=200, orders=orders)
+        payload = {'orders': [order_row_to_dict(row) for row in db.session.execute(order_listing_query())]}
+        admin = db.session.scalar(select(User).where(User.is_admin))
+        token = create_access_token(identity=admin.id, additional_claims=identity_claims(admin))
+
+        pretty = DefaultJSONProvider(app)
+        pretty.compact = False
+        encode = {
+            'stdlib_pretty': lambda obj: pretty.response(obj).get_data(),
+            'stdlib_compact': lambda obj: json.dumps(obj, separators=(',', ':'), sort_keys=True).encode('utf-8'),
+            'configured': lambda obj: app.json.response(obj).get_data(),
+        }
+        encoding = {name: time_encode(fn, payload, repeats) for name, fn in encode.items()}
+
+    client = app.test_client()
+    wire = {
+        accept or 'identity': time_request(client, {'Authorization': f'Bearer {token}', 'Accept-Encoding': accept}, repeats)
+        for accept in ('', 'gzip', 'br')
+    }
+    cleanup()
+    print(json.dumps({
+        'orders': orders,
+        'orjson': orjson is not None,
+        'encode': encoding,
+        'wire': wire,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Load test: /api/menus/today latency with and without a concurrent /api/login storm.
+# Runs the app under a local threaded WSGI server so hashing competes with real request threads.
+# Usage (from server/): python -m benchmarks.bench_login_storm [seconds] [login_threads]
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+from benchmarks.common import cleanup
+from app import create_app, db, password_hasher
+from auth import identity_claims
+from flask_jwt_extended import create_access_token
+from models import MealOption, Menu, User
+from werkzeug.serving import make_server
+
+app = create_app()
+
+
+def request(base_url, path, body=None, headers=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, headers={'Content-Type': 'application/json', **(headers or {})})
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'mean': statistics.mean(samples) * 1000}
+
+
+def read_menus(base_url, token, stop):
+    latencies = []
+    headers = {'Authorization': f'Bearer {token}'}
+    while not stop.is_set():
+        start = time.perf_counter()
+        request(base_url, '/api/menus/today', headers=headers)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def login_storm(base_url, stop, statuses):
+    while not stop.is_set():
+        status = request(base_url, '/api/login', {'email': 'storm@example.com', 'password': 'secret'})
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+def phase(base_url, token, seconds, login_threads):
+    stop = threading.Event()
+    statuses = {}
+    stormers = [threading.Thread(target=login_storm, args=(base_url, stop, statuses)) for _ in range(login_threads)]
+    for thread in stormers:
+        thread.start()
+    timer = threading.Timer(seconds, stop.set)
+    timer.start()
+    latencies = read_menus(base_url, token, stop)
+    for thread in stormers:
+        thread.join()
+    return percentiles(latencies), statuses
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    login_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with app.app_context():
+        db.create_all()
+        user = User(username='storm', email='storm@example.com', password_hash=password_hasher.hash('secret'))
+        meals = [MealOption(name=f'Meal {i}', price=i + 1) for i in range(10)]
+        db.session.add(user)
+        db.session.add(Menu(date=datetime.now().date(), meal_options=meals))
+        db.session.commit()
+        token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    quiet, _ = phase(base_url, token, seconds, 0)
+    storm, statuses = phase(base_url, token, seconds, login_threads)
+    server.shutdown()
+    cleanup()
+
+    print(json.dumps({
+        'bcrypt_rounds': app.config['BCRYPT_LOG_ROUNDS'],
+        'hash_workers': app.config['PASSWORD_HASH_WORKERS'],
+        'login_threads': login_threads,
+        'menu_latency_ms': {'quiet': quiet, 'login_storm': storm},
+        'login_statuses': statuses,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Benchmark: cold start of a server process, i.e. what every new worker pays before it can answer.
+# Each run is a fresh interpreter that imports the app module, calls create_app() and serves its
+# first requests (/ and an authenticated database read) through the test client.
+# Usage (from server/): python -m benchmarks.bench_startup [runs]
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import cleanup
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process; prints its timings (milliseconds) as JSON
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get('/')
+first_request = time.perf_counter()
+with app.app_context():
+    from flask_jwt_extended import create_access_token
+    token = create_access_token(identity=1, additional_claims={'is_admin': True})
+client.get('/api/meal-options', headers={'Authorization': f'Bearer {token}'})
+first_query = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (first_request - created) * 1000,
+    'first_db_request_ms': (first_query - first_request) * 1000,
+    'alembic_loaded': 'alembic' in sys.modules,
+}))
+'''
+
+
+def run_child():
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=SERVER_DIR, env=os.environ,
+                            capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    from app import create_app, init_db
+    init_db(create_app())
+    run_child()  # warm the filesystem and bytecode caches
+    results = [run_child() for _ in range(runs)]
+    cleanup()
+
+    report = {'runs': runs, 'alembic_loaded': results[0].pop('alembic_loaded')}
+    for name in results[0]:
+        values = sorted(result[name] for result in results)
+        report[name] = {'median': round(statistics.median(values), 1), 'max': round(values[-1], 1)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
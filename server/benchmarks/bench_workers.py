@@ -0,0 +1,142 @@
+# Benchmark: menu-read and order-write throughput under gunicorn (gunicorn.conf.py) with 1..N
+# worker processes against one local SQLite database in WAL mode.
+# Load comes from separate client processes, the same number for every worker count, each running
+# a few keep-alive connections. Clients share the machine with the server, so leave them some cores.
+# Usage (from server/): python -m benchmarks.bench_workers [max_workers] [seconds] [client_processes]
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import cleanup
+from benchmarks.seed import seed
+from app import create_app, db, init_db, password_hasher
+from auth import identity_claims
+from flask_jwt_extended import create_access_token
+from models import Menu, User
+from sqlalchemy import select
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONNECTIONS_PER_CLIENT = 4
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{port}', GUNICORN_MAX_REQUESTS='0')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn'], cwd=SERVER_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('gunicorn did not start')
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=60)
+
+
+# One client process: issues `request` back to back until `until`, round-robin over keep-alive
+# connections from a single thread, so the load generator stays cheap but every client process
+# keeps CONNECTIONS_PER_CLIENT sockets open on the server
+def run_client(args):
+    port, request, tokens, until = args
+    method, path, body = request
+    latencies, errors = [], 0
+    connections = [http.client.HTTPConnection('127.0.0.1', port, timeout=30) for _ in range(CONNECTIONS_PER_CLIENT)]
+    i = 0
+    while time.time() < until:
+        connection = connections[i % len(connections)]
+        headers = {'Authorization': f'Bearer {tokens[i % len(tokens)]}', 'Content-Type': 'application/json'}
+        i += 1
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+    return latencies, errors
+
+
+def measure(pool, port, request, tokens, seconds, clients):
+    until = time.time() + seconds
+    results = pool.map(run_client, [(port, request, tokens[i::clients], until) for i in range(clients)])
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    return {
+        'requests_per_s': round(len(latencies) / seconds, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+        'errors': sum(errors for _, errors in results),
+    }
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    clients = int(sys.argv[3]) if len(sys.argv) > 3 else max(2, max_workers)
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        seed(password_hasher, users=200, orders=20000)
+        users = db.session.scalars(select(User).where(User.is_admin.is_(False))).all()
+        tokens = [create_access_token(identity=user.id, additional_claims=identity_claims(user)) for user in users]
+        meal_id = db.session.scalars(select(Menu).order_by(Menu.date.desc())).first().meal_options[0].id
+        db.engine.dispose()
+
+    requests = {
+        'menu_read': ('GET', '/api/menus/today', None),
+        'order_write': ('POST', '/api/orders', json.dumps({'meal_option_id': meal_id, 'quantity': 1})),
+    }
+    report = {'cpu_count': os.cpu_count(), 'client_processes': clients, 'seconds': seconds, 'workers': {}}
+    with multiprocessing.Pool(clients) as pool:
+        for workers in range(1, max_workers + 1):
+            port = free_port()
+            server = start_server(workers, port)
+            try:
+                measure(pool, port, requests['menu_read'], tokens, 1, clients)  # warm up every worker
+                report['workers'][workers] = {
+                    name: measure(pool, port, request, tokens, seconds, clients) for name, request in requests.items()
+                }
+            finally:
+                stop_server(server)
+            print(f'{workers} workers  ' + '  '.join(
+                f'{name} {result["requests_per_s"]:>8.1f} req/s (p99 {result["p99_ms"]} ms)'
+                for name, result in report['workers'][workers].items()
+            ), file=sys.stderr)
+    cleanup()
+
+    single = report['workers'][1]
+    report['speedup'] = {
+        workers: {name: round(result['requests_per_s'] / single[name]['requests_per_s'], 2) if single[name]['requests_per_s'] else None
+                  for name, result in results.items()}
+        for workers, results in report['workers'].items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# Shared helpers for the benchmark scripts. Import this module before calling create_app() so
+# the app is bound to a scratch database instead of mealy.db, with admission control off.
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix='mealy-bench-')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{SCRATCH_DIR}/bench.db')
+# Tokens are minted in-process; a fixed key keeps create_app() from warning about a random one
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+# Benchmarks drive the endpoints far above any per-caller budget
+os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+
+def cleanup():
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@contextmanager
+def count_statements(engine):
+    counter = StatementCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
@@ -0,0 +1,134 @@
+# Drives the real endpoints and collects latency percentiles, throughput and SQL statement counts.
+import json
+import logging
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.common import count_statements
+from benchmarks.seed import PASSWORD, user_email
+from werkzeug.serving import make_server
+
+
+# In-process driver: Flask test client, no sockets
+class TestClientDriver:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, len(response.data)
+
+    def close(self):
+        pass
+
+
+# Real HTTP against a local threaded WSGI server
+class ServerDriver:
+    def __init__(self, app):
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def request(self, method, path, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=data, method=method,
+            headers={'Content-Type': 'application/json', **(headers or {})}
+        )
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, len(error.read())
+
+    def close(self):
+        self.server.shutdown()
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+# (name, method, path, body, headers) per endpoint; `i` varies the request within a run
+def scenarios(tokens, admin_token, meal_ids):
+    def user(i):
+        return bearer(tokens[i % len(tokens)])
+
+    return {
+        'login': lambda i: ('POST', '/api/login', {'email': user_email(i % len(tokens) + 1), 'password': PASSWORD}, None),
+        'menus_today': lambda i: ('GET', '/api/menus/today', None, user(i)),
+        'place_order': lambda i: ('POST', '/api/orders', {'meal_option_id': meal_ids[i % len(meal_ids)], 'quantity': 1}, user(i)),
+        'orders': lambda i: ('GET', '/api/orders', None, user(i)),
+        'orders_admin_page': lambda i: ('GET', '/api/orders/admin?limit=100', None, bearer(admin_token)),
+        'orders_admin_today': lambda i: ('GET', '/api/orders/admin?status=Pending&limit=100', None, bearer(admin_token)),
+        'revenue': lambda i: ('GET', '/api/revenue', None, bearer(admin_token)),
+    }
+
+
+def percentile(samples, q):
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def summarize(latencies, elapsed, statements, statuses, sizes):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'sql_per_request': round(statements / len(latencies), 2),
+        'mean_response_bytes': round(statistics.mean(sizes)),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def run_scenario(driver, engine, build, requests, concurrency):
+    latencies, sizes, statuses = [], [], {}
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            method, path, body, headers = build(i)
+            start = time.perf_counter()
+            status, size = driver.request(method, path, body, headers)
+            latency = time.perf_counter() - start
+            with lock:
+                latencies.append(latency)
+                sizes.append(size)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    with count_statements(engine) as statements:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, statements.count, statuses, sizes)
+
+
+# Relative change of each metric against a saved baseline report (positive = higher than baseline)
+def compare(report, baseline):
+    comparison = {}
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        comparison[name] = {
+            metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1) if previous[metric] else None
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'sql_per_request')
+        }
+    return comparison
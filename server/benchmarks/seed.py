@@ -0,0 +1,79 @@
+# Synthetic dataset for benchmarks: users, meal options, a year of menus and a large order history.
+# Rows are written with Core executemany in batches so millions of orders seed in reasonable time.
+import random
+from datetime import date, timedelta
+
+from config import db
+from models import MealOption, Menu, Order, User, meal_menu
+from prep_board import rebuild_prep_board
+from revenue import rebuild_daily_revenue
+from sqlalchemy import func, insert, select
+
+BATCH_SIZE = 20000
+STATUSES = ['Pending', 'Preparing', 'Ready', 'Completed', 'Cancelled']
+PASSWORD = 'benchmark'
+
+
+def batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def user_email(i):
+    return f'user{i}@example.com'
+
+
+# Seed into the app's database (call inside an app context). Returns False if it already had orders.
+def seed(password_hasher, users=1000, meals=40, days=365, orders=100000, menu_size=8, seed=42):
+    if db.session.scalar(select(func.count(Order.id))):
+        return False
+    rng = random.Random(seed)
+    today = date.today()
+    password_hash = password_hasher.hash(PASSWORD)
+
+    db.session.execute(insert(User), [
+        {'username': 'admin', 'email': 'admin@example.com', 'password_hash': password_hash, 'is_admin': True}
+    ] + [
+        {'username': f'user{i}', 'email': user_email(i), 'password_hash': password_hash, 'is_admin': False}
+        for i in range(1, users + 1)
+    ])
+    prices = [round(rng.uniform(2, 15), 2) for _ in range(meals)]
+    db.session.execute(insert(MealOption), [{'name': f'Meal {i + 1}', 'price': price} for i, price in enumerate(prices)])
+
+    menu_dates = [today - timedelta(days=offset) for offset in range(days)]
+    db.session.execute(insert(Menu), [{'date': menu_date} for menu_date in menu_dates])
+    menu_ids = db.session.scalars(select(Menu.id)).all()
+    db.session.execute(insert(meal_menu), [
+        {'menu_id': menu_id, 'meal_option_id': meal_id}
+        for menu_id in menu_ids
+        for meal_id in rng.sample(range(1, meals + 1), min(menu_size, meals))
+    ])
+
+    # Recent days are busier: order age follows an exponential distribution (mean 60 days)
+    def order_rows():
+        for _ in range(orders):
+            meal_id = rng.randint(1, meals)
+            quantity = rng.randint(1, 4)
+            age = min(int(rng.expovariate(1 / 60)), days - 1)
+            yield {
+                'user_id': rng.randint(2, users + 1),
+                'meal_option_id': meal_id,
+                'date': today - timedelta(days=age),
+                'quantity': quantity,
+                'status': 'Pending' if age == 0 else rng.choice(STATUSES),
+                'unit_price': prices[meal_id - 1],
+                'total_price': prices[meal_id - 1] * quantity,
+            }
+
+    for batch in batches(order_rows()):
+        db.session.execute(insert(Order), batch)
+    db.session.commit()
+    rebuild_daily_revenue()
+    rebuild_prep_board()
+    return True
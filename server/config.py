@@ -2,36 +2,103 @@
 import os
 
 # Remote library imports
-from flask import Flask
-from flask_cors import CORS
-from flask_migrate import Migrate
-from flask_restful import Api
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
-from flask_jwt_extended import JWTManager
+from werkzeug.local import LocalProxy
 
-# Instantiate app, set attributes
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///mealy.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
+# Local imports
+from admission import parse_concurrency_limits, parse_rate_limits
+from database import sqlite_pragmas
 
-# Set Flask secret key
-app.config['SECRET_KEY'] = os.urandom(24)  
+# Settings read from the environment; create_app() applies them, then any overrides it is given
+def settings(env=os.environ):
+    return {
+        # Signs sessions and, through Flask-JWT-Extended, access tokens. Must be the same in every
+        # worker and across restarts, or tokens issued by one process are rejected by the others.
+        'SECRET_KEY': env.get('SECRET_KEY'),
 
-# Define metadata, instantiate db
+        # Number of reverse proxies in front of the app whose X-Forwarded-For is trusted; the client
+        # address (used by rate limits) is taken from that header. 0 = use the socket address
+        'PROXY_FIX_X_FOR': int(env.get('PROXY_FIX_X_FOR', 0)),
+
+        'SQLALCHEMY_DATABASE_URI': env.get('DATABASE_URL', 'sqlite:///mealy.db'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLITE_PRAGMAS': sqlite_pragmas(env),
+
+        # List responses at least this large (bytes) are gzip/brotli compressed when the client accepts it
+        'COMPRESS_MIN_SIZE': int(env.get('COMPRESS_MIN_SIZE', 1024)),
+
+        # Password hashing: bcrypt cost factor and the bounded worker pool that runs it
+        'BCRYPT_LOG_ROUNDS': int(env.get('BCRYPT_LOG_ROUNDS', 12)),
+        'PASSWORD_HASH_WORKERS': int(env.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2))),
+        'PASSWORD_HASH_QUEUE': int(env.get('PASSWORD_HASH_QUEUE', 16)),
+        'PASSWORD_HASH_RETRY_AFTER': int(env.get('PASSWORD_HASH_RETRY_AFTER', 1)),
+
+        # Optional group commit for order placement: batch size and how long to wait for a batch to fill
+        'ORDER_GROUP_COMMIT': env.get('ORDER_GROUP_COMMIT', '').lower() in ('1', 'true', 'yes'),
+        'ORDER_GROUP_COMMIT_MAX_BATCH': int(env.get('ORDER_GROUP_COMMIT_MAX_BATCH', 64)),
+        'ORDER_GROUP_COMMIT_MAX_WAIT_MS': float(env.get('ORDER_GROUP_COMMIT_MAX_WAIT_MS', 5)),
+
+        # Server-Sent Events for order status changes
+        'SSE_HEARTBEAT_SECONDS': float(env.get('SSE_HEARTBEAT_SECONDS', 15)),
+        'SSE_BUFFER_SIZE': int(env.get('SSE_BUFFER_SIZE', 100)),
+        'SSE_HISTORY_SIZE': int(env.get('SSE_HISTORY_SIZE', 50)),
+        # Streams read events committed by any process from the order_events table: how often
+        # (seconds) it is polled while streams are open, and how long (minutes) events are kept
+        # for reconnecting clients
+        'SSE_POLL_SECONDS': float(env.get('SSE_POLL_SECONDS', 0.5)),
+        'SSE_EVENT_RETENTION_MINUTES': float(env.get('SSE_EVENT_RETENTION_MINUTES', 60)),
+        # Each open stream holds a request thread: cap them per process (by default half of the
+        # gunicorn threads, leaving the rest for other requests) and end each after a while so
+        # clients reconnect, possibly to a less busy worker
+        'SSE_MAX_STREAMS': int(env.get('SSE_MAX_STREAMS', max(1, int(env.get('GUNICORN_THREADS', 8)) // 2))),
+        'SSE_MAX_LIFETIME_SECONDS': float(env.get('SSE_MAX_LIFETIME_SECONDS', 300)),
+        'SSE_RETRY_AFTER': int(env.get('SSE_RETRY_AFTER', 10)),
+
+        # Idempotency-Key support: how long stored responses are replayed, how many stay in memory,
+        # and how long a request in progress holds its key before a retry may run it again
+        'IDEMPOTENCY_TTL_HOURS': float(env.get('IDEMPOTENCY_TTL_HOURS', 24)),
+        'IDEMPOTENCY_CACHE_SIZE': int(env.get('IDEMPOTENCY_CACHE_SIZE', 10000)),
+        'IDEMPOTENCY_LOCK_SECONDS': float(env.get('IDEMPOTENCY_LOCK_SECONDS', 30)),
+
+        # Admission control (admission.py): per-caller token buckets per route class ("class=rate/burst",
+        # rate in requests per second) and per-process caps on requests in progress per route class
+        'RATE_LIMIT_ENABLED': env.get('RATE_LIMIT_ENABLED', '1').lower() in ('1', 'true', 'yes'),
+        'RATE_LIMITS': parse_rate_limits(env.get('RATE_LIMITS', 'auth=1/30,auth_address=1/100,reads=20/60,writes=5/20,analytics=0.5/5')),
+        'CONCURRENCY_LIMITS': parse_concurrency_limits(env.get('CONCURRENCY_LIMITS', 'auth=16,reads=64,writes=32,analytics=4')),
+
+        # In-process caches: serialized menu responses, and how long user snapshots are reused (seconds)
+        'MENU_CACHE_SIZE': int(env.get('MENU_CACHE_SIZE', 64)),
+        'IDENTITY_CACHE_TTL': int(env.get('IDENTITY_CACHE_TTL', 60)),
+        # Writes invalidate the menu and analytics caches only in the process that made them; with
+        # several server processes this bounds how long (seconds) the others serve old data. 0 = no limit
+        'CACHE_MAX_AGE_SECONDS': float(env.get('CACHE_MAX_AGE_SECONDS', 0)),
+
+        # Longest range /api/menus?from=&to= accepts, in days
+        'MENU_RANGE_MAX_DAYS': int(env.get('MENU_RANGE_MAX_DAYS', 31)),
+
+        # Longest range /api/revenue/analytics accepts, in days
+        'ANALYTICS_MAX_DAYS': int(env.get('ANALYTICS_MAX_DAYS', 3 * 366)),
+
+        # Requests slower than this (milliseconds) are logged with their SQL statements; 0 disables
+        'SLOW_REQUEST_MS': int(env.get('SLOW_REQUEST_MS', 0)),
+    }
+
+# Define metadata, instantiate db (bound to an app by create_app)
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 db = SQLAlchemy(metadata=metadata)
-migrate = Migrate(app, db)
-db.init_app(app)
-
-# Instantiate REST API
-api = Api(app)
 
-# Instantiate CORS
-CORS(app)
+# Per-app services are created by create_app() and kept in app.extensions; modules reach the
+# current app's instance through this proxy, so apps in one process never share state
+def app_service(name):
+    return LocalProxy(lambda: current_app.extensions[name])
 
-# Instantiate JWT Manager
-jwt = JWTManager(app)
+# Flask-Migrate imports Alembic, which is close to half of the server's import time, so it is only
+# loaded where migrations run: the flask CLI and init_db()
+def init_migrate(app):
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
@@ -0,0 +1,81 @@
+# Shared pytest fixtures. Run the suite from server/: `python -m pytest`
+from datetime import date
+
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+
+from app import create_app, init_db
+from auth import identity_claims
+from config import db
+from models import MealOption, Order, User
+from prep_board import record_prep
+from revenue import record_revenue
+
+# Settings for test apps: a fixed key, cheap bcrypt, and no rate limits (tests call endpoints back to back)
+TEST_CONFIG = {
+    'SECRET_KEY': 'test',
+    'BCRYPT_LOG_ROUNDS': 4,
+    'RATE_LIMIT_ENABLED': False,
+}
+
+
+# Builds apps on their own SQLite file, migrated to the latest revision; extra settings override TEST_CONFIG
+@pytest.fixture
+def make_app(tmp_path):
+    count = 0
+
+    def make(**config):
+        nonlocal count
+        count += 1
+        app = create_app({
+            **TEST_CONFIG,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/test-{count}.db',
+            **config,
+        })
+        init_db(app)
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Authorization header for `user` (call inside an app context)
+def auth_header(user):
+    token = create_access_token(identity=user.id, additional_claims=identity_claims(user))
+    return {'Authorization': f'Bearer {token}'}
+
+
+# Row helpers for tests; call inside an app context. Each commits, so ids are set on return.
+def add_user(username, password=None, is_admin=False):
+    password_hash = current_app.extensions['password_hasher'].hash(password) if password else 'x'
+    user = User(username=username, email=f'{username}@example.com', password_hash=password_hash, is_admin=is_admin)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_meal(name, price):
+    meal = MealOption(name=name, price=price)
+    db.session.add(meal)
+    db.session.commit()
+    return meal
+
+
+def add_order(user, meal, quantity=1, on=None, status='Pending'):
+    order = Order(user_id=user.id, meal_option_id=meal.id, date=on or date.today(), quantity=quantity,
+                  unit_price=meal.price, total_price=meal.price * quantity, status=status)
+    db.session.add(order)
+    # Keep the rollups in step, as the order write paths do
+    record_revenue(order.date, order.total_price, 1)
+    record_prep(order.date, meal.id, status, quantity, 1, order.total_price)
+    db.session.commit()
+    return order
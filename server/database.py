@@ -0,0 +1,42 @@
+import os
+
+from sqlalchemy import event
+
+# Environment-driven engine configuration.
+#
+# SQLite: connect-time pragmas (WAL so readers don't block on the writer, a busy timeout
+# instead of immediate "database is locked", larger page cache and mmap).
+# Server databases (PostgreSQL, MySQL, ...): connection pool sizing, pre-ping and recycle.
+
+def sqlite_pragmas(env=os.environ):
+    return {
+        'journal_mode': env.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': env.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(env.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        # Negative values are KiB rather than pages
+        'cache_size': int(env.get('SQLITE_CACHE_SIZE', -64000)),
+        'mmap_size': int(env.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    }
+
+def engine_options(uri, env=os.environ):
+    if uri.startswith('sqlite'):
+        return {'connect_args': {'timeout': int(env.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}}
+    return {
+        'pool_size': int(env.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(env.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(env.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(env.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+# Apply the pragmas on every new DBAPI connection of a SQLite engine
+def install_sqlite_pragmas(engine, pragmas):
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,45 @@
+# Production server settings, read by `gunicorn` when started from server/ (or `gunicorn -c gunicorn.conf.py`).
+# Each value can be overridden from the environment; run `flask init-db` before the first start.
+#
+# Reloading: `kill -HUP <master>` re-reads this file and replaces the workers gracefully, letting
+# in-flight requests finish (up to graceful_timeout). With preload the code itself is loaded once in
+# the master, so to deploy new code either start a new master with `kill -USR2 <master>` and stop
+# the old one with `kill -TERM <old master>`, or set GUNICORN_PRELOAD=0 so that HUP reloads it too.
+import os
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('BIND', '0.0.0.0:5555')
+
+# Processes, and request threads in each. Threads cover I/O waits (SQLite busy waits, bcrypt runs
+# on its own pool); every open /api/orders/stream connection also holds a thread for its lifetime,
+# so at most SSE_MAX_STREAMS (half the threads by default) are open in each worker.
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+worker_class = 'gthread'
+
+# Import the app once in the master and fork workers from it: faster worker starts and shared
+# memory pages. post_fork below gives every worker its own database connections.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+
+# Recycle each worker after this many requests (plus up to `jitter`, so they don't restart together)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Workers must agree on the key that signs access tokens; a random per-process key would make
+# every worker reject tokens issued by the others
+if not os.environ.get('SECRET_KEY'):
+    raise RuntimeError('SECRET_KEY must be set to run the server under gunicorn')
+
+# Writes invalidate the menu and analytics caches only in the worker that made them
+if workers > 1:
+    os.environ.setdefault('CACHE_MAX_AGE_SECONDS', '5')
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from wsgi import after_fork
+        after_fork()
@@ -0,0 +1,195 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from functools import wraps
+
+from config import app_service, db
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from models import IdempotencyKey
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+MAX_KEY_LENGTH = 255
+# How often (seconds) a process deletes expired keys as part of claiming a new one
+SWEEP_INTERVAL = 300
+
+# A completed response as stored for replay
+StoredResponse = namedtuple('StoredResponse', ['fingerprint', 'status', 'body', 'created_at'])
+
+# The key is held by a request that is still running (possibly in another process)
+class IdempotencyConflict(Exception):
+    pass
+
+# The key was already used for a different request
+class IdempotencyMismatch(Exception):
+    pass
+
+# Method, path, query string and body; a key may only be replayed for the same request
+def request_fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method, request.path, request.query_string, request.get_data()):
+        digest.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+# Dedup store for Idempotency-Key. Completed responses live in the idempotency_keys table for
+# `ttl` and in a bounded in-process LRU in front of it. A request first claims its key with an
+# INSERT; a duplicate in the same process waits for the first one and gets its response, a
+# duplicate in another process gets IdempotencyConflict until the response is stored.
+class IdempotencyStore:
+    def __init__(self, ttl, max_entries=10000, lock_seconds=30):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock_seconds = lock_seconds
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0
+
+    def _cached(self, scope):
+        with self._lock:
+            stored = self._entries.get(scope)
+            if stored is None:
+                return None
+            if stored.created_at < datetime.utcnow() - self.ttl:
+                del self._entries[scope]
+                return None
+            self._entries.move_to_end(scope)
+            return stored
+
+    def _remember(self, scope, stored):
+        with self._lock:
+            self._entries[scope] = stored
+            self._entries.move_to_end(scope)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # Insert a pending row for the key. Returns the stored response if the key already completed,
+    # None once this request owns the key.
+    def _claim(self, scope, fingerprint):
+        user_id, key = scope
+        now = datetime.utcnow()
+        if time.monotonic() - self._last_sweep > SWEEP_INTERVAL:
+            self._last_sweep = time.monotonic()
+            sweep_expired_keys(self.ttl)
+        try:
+            db.session.execute(insert(IdempotencyKey).values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now))
+            db.session.commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+
+        row = db.session.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.body, IdempotencyKey.created_at)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        ).one_or_none()
+        if row is None:
+            raise IdempotencyConflict()
+        expired = row.created_at < now - self.ttl
+        if not expired:
+            if row.fingerprint != fingerprint:
+                raise IdempotencyMismatch()
+            if row.status_code is not None:
+                return StoredResponse(row.fingerprint, row.status_code, row.body, row.created_at)
+            if row.created_at > now - timedelta(seconds=self.lock_seconds):
+                raise IdempotencyConflict()
+        # Expired, or abandoned by a request that never finished: take it over
+        result = db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.created_at == row.created_at)
+            .values(fingerprint=fingerprint, status_code=None, body=None, created_at=now)
+        )
+        db.session.commit()
+        if result.rowcount == 0:
+            raise IdempotencyConflict()
+        return None
+
+    def _complete(self, scope, fingerprint, response):
+        user_id, key = scope
+        body = response.get_data()
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(status_code=response.status_code, body=body)
+        )
+        db.session.commit()
+        self._remember(scope, StoredResponse(fingerprint, response.status_code, body, datetime.utcnow()))
+
+    def _release(self, scope):
+        user_id, key = scope
+        db.session.rollback()
+        db.session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None))
+        )
+        db.session.commit()
+
+    # Run `view` at most once per scope (user id, key) and return its response, or the stored one
+    def run(self, scope, fingerprint, view):
+        stored = self._cached(scope)
+        if stored is None:
+            with self._lock:
+                done = self._in_flight.get(scope)
+                leader = done is None
+                if leader:
+                    done = self._in_flight[scope] = threading.Event()
+            if not leader:
+                # Same key already running in this process: wait for it instead of inserting again
+                if not done.wait(self.lock_seconds):
+                    raise IdempotencyConflict()
+                stored = self._cached(scope)
+                if stored is None:
+                    raise IdempotencyConflict()
+            else:
+                try:
+                    stored = self._claim(scope, fingerprint)
+                    if stored is None:
+                        return self._execute(scope, fingerprint, view)
+                    self._remember(scope, stored)
+                finally:
+                    with self._lock:
+                        self._in_flight.pop(scope, None)
+                    done.set()
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyMismatch()
+        return replay(stored)
+
+    def _execute(self, scope, fingerprint, view):
+        # If the view raises, the claim stays pending until lock_seconds pass: the write may
+        # still have happened, so a retry must not run it again straight away
+        response = make_response(view())
+        if response.status_code < 500 and not response.is_streamed:
+            self._complete(scope, fingerprint, response)
+        else:
+            self._release(scope)
+        return response
+
+def replay(stored):
+    response = current_app.response_class(stored.body, status=stored.status, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+# Delete stored responses older than `ttl`; returns the number of keys removed
+def sweep_expired_keys(ttl):
+    result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < datetime.utcnow() - ttl))
+    db.session.commit()
+    return result.rowcount
+
+idempotency_store = app_service('idempotency_store')
+
+# Honour an optional Idempotency-Key header: the first request with a key runs the view and its
+# response is stored; retries with the same key get that response back without running it again.
+# Apply inside jwt_required/admin_required, since keys are scoped to the caller.
+def idempotent(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return fn(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({'message': f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+        return idempotency_store.run((get_jwt_identity(), key), request_fingerprint(), lambda: fn(*args, **kwargs))
+    return wrapper
@@ -0,0 +1,33 @@
+from flask.json.provider import DefaultJSONProvider
+
+# orjson is optional; without it responses go through the stdlib encoder
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Match the stdlib provider: sorted keys, int keys allowed, and dates passed to
+# default() so they keep Flask's HTTP-date format
+ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+# Compact JSON for app.json: orjson when installed, otherwise the stdlib encoder without whitespace
+class FastJSONProvider(DefaultJSONProvider):
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('separators', (',', ':'))
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
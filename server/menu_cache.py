@@ -0,0 +1,66 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# A serialized menu response plus the meal ids it contains (for invalidation)
+CachedMenu = namedtuple('CachedMenu', ['status', 'body', 'etag', 'meal_ids', 'expires'])
+
+# Keys are (view, date) or, for range views, (view, (start, end))
+def covers(key, menu_date):
+    scope = key[1]
+    if isinstance(scope, tuple):
+        return scope[0] <= menu_date <= scope[1]
+    return scope == menu_date
+
+# Bounded LRU cache of serialized menu responses, keyed by (view, date).
+# Entries are dropped when the menu for their date changes or when one of their meals is edited.
+# Those edits are only seen by the process that made them, so with several server processes
+# `max_age` (seconds, 0 = no limit) bounds how long the others keep serving an old menu.
+class MenuCache:
+    def __init__(self, max_entries=64, max_age=0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a response built from a stale read is not stored
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires is not None and entry.expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, status, body, meal_ids=(), generation=None):
+        expires = time.monotonic() + self.max_age if self.max_age else None
+        entry = CachedMenu(status, body, hashlib.sha1(body).hexdigest(), frozenset(meal_ids), expires)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate_date(self, menu_date):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if covers(key, menu_date)]:
+                del self._entries[key]
+
+    def invalidate_meal(self, meal_id):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, entry in self._entries.items() if meal_id in entry.meal_ids]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
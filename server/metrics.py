@@ -0,0 +1,135 @@
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+# Latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Longest statement text kept for the slow-request log
+MAX_LOGGED_STATEMENT = 500
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels(**values):
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in values.items()) + '}'
+
+
+# Per-route series for one (route, method) pair
+class RouteStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.response_bytes = 0
+        self.statuses = {}
+
+
+# Per-request timing and SQL instrumentation, exposed in Prometheus text format on /metrics.
+# SQL is attributed to the current request through SQLAlchemy engine events; requests slower
+# than `slow_request_ms` (0 disables) are logged with the statements they ran.
+class RequestMetrics:
+    def __init__(self, app=None, engine=None):
+        self._routes = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, engine)
+
+    def init_app(self, app, engine):
+        self.app = app
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', 0)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # Extra series for /metrics: `collector()` returns a list of exposition lines
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def _start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+        g.sql_log = [] if self.slow_request_ms else None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        if not has_request_context() or 'metrics_start' not in g:
+            return
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+        if g.sql_log is not None:
+            g.sql_log.append((elapsed, statement[:MAX_LOGGED_STATEMENT]))
+
+    def _finish_request(self, response):
+        if 'metrics_start' not in g:
+            return response
+        latency = time.perf_counter() - g.metrics_start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        self.observe(route, request.method, response.status_code, latency,
+                     g.sql_statements, g.sql_seconds, response.content_length or 0)
+
+        if self.slow_request_ms and latency * 1000 >= self.slow_request_ms:
+            statements = '\n'.join(f'  {elapsed * 1000:.2f}ms {statement}' for elapsed, statement in g.sql_log)
+            self.app.logger.warning(
+                f"Slow request {request.method} {request.full_path} took {latency * 1000:.1f}ms "
+                f"({g.sql_statements} SQL statements, {g.sql_seconds * 1000:.1f}ms in SQL)\n{statements}"
+            )
+        return response
+
+    def observe(self, route, method, status, latency, sql_statements, sql_seconds, response_bytes):
+        with self._lock:
+            stats = self._routes.setdefault((route, method), RouteStats())
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[i] += 1
+            stats.count += 1
+            stats.latency_sum += latency
+            stats.sql_statements += sql_statements
+            stats.sql_seconds += sql_seconds
+            stats.response_bytes += response_bytes
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def render(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                '# HELP mealy_request_duration_seconds Request latency per route.',
+                '# TYPE mealy_request_duration_seconds histogram',
+            ]
+            for (route, method), stats in routes:
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    lines.append(f'mealy_request_duration_seconds_bucket{labels(route=route, method=method, le=bound)} {count}')
+                lines.append(f'mealy_request_duration_seconds_bucket{labels(route=route, method=method, le="+Inf")} {stats.count}')
+                lines.append(f'mealy_request_duration_seconds_sum{labels(route=route, method=method)} {stats.latency_sum}')
+                lines.append(f'mealy_request_duration_seconds_count{labels(route=route, method=method)} {stats.count}')
+
+            series = [
+                ('mealy_requests_total', 'Requests per route and status.', None),
+                ('mealy_request_sql_statements_total', 'SQL statements executed while handling requests.', 'sql_statements'),
+                ('mealy_request_sql_seconds_total', 'Time spent executing SQL while handling requests.', 'sql_seconds'),
+                ('mealy_response_bytes_total', 'Response body bytes (streamed bodies are not counted).', 'response_bytes'),
+            ]
+            for name, help_text, attribute in series:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, method), stats in routes:
+                    if attribute is None:
+                        for status, count in sorted(stats.statuses.items()):
+                            lines.append(f'{name}{labels(route=route, method=method, status=status)} {count}')
+                    else:
+                        lines.append(f'{name}{labels(route=route, method=method)} {getattr(stats, attribute)}')
+        for collector in self._collectors:
+            lines.extend(collector())
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,32 @@
+"""add order indexes
+
+Revision ID: 3acae3f42b31
+Revises: cbb6aed41037
+Create Date: 2026-10-17 11:03:27.540981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3acae3f42b31'
+down_revision = 'cbb6aed41037'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_user_id_date', ['user_id', 'date'], unique=False)
+        batch_op.create_index('ix_orders_date_status', ['date', 'status'], unique=False)
+        batch_op.create_index('ix_orders_meal_option_id', ['meal_option_id'], unique=False)
+        batch_op.create_index('ix_orders_status', ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_status')
+        batch_op.drop_index('ix_orders_meal_option_id')
+        batch_op.drop_index('ix_orders_date_status')
+        batch_op.drop_index('ix_orders_user_id_date')
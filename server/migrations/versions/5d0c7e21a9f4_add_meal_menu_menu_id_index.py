@@ -0,0 +1,26 @@
+"""add meal_menu menu_id index
+
+Revision ID: 5d0c7e21a9f4
+Revises: 9434f4ae8b08
+Create Date: 2026-10-17 16:42:08.317254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0c7e21a9f4'
+down_revision = '9434f4ae8b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('meal_menu', schema=None) as batch_op:
+        batch_op.create_index('ix_meal_menu_menu_id', ['menu_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('meal_menu', schema=None) as batch_op:
+        batch_op.drop_index('ix_meal_menu_menu_id')
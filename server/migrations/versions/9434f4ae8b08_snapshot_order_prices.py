@@ -0,0 +1,39 @@
+"""snapshot order prices
+
+Revision ID: 9434f4ae8b08
+Revises: 3acae3f42b31
+Create Date: 2026-10-17 13:26:50.114702
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9434f4ae8b08'
+down_revision = '3acae3f42b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unit_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('total_price', sa.Float(), nullable=True))
+
+    # Backfill from the current meal prices, the same values the live computation produced
+    op.execute(
+        "UPDATE orders SET unit_price = COALESCE("
+        "(SELECT meal_options.price FROM meal_options WHERE meal_options.id = orders.meal_option_id), 0)"
+    )
+    op.execute("UPDATE orders SET total_price = quantity * unit_price")
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.alter_column('unit_price', existing_type=sa.Float(), nullable=False)
+        batch_op.alter_column('total_price', existing_type=sa.Float(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('total_price')
+        batch_op.drop_column('unit_price')
@@ -0,0 +1,41 @@
+"""autoincrement order ids
+
+Revision ID: a93f5b2c6e18
+Revises: 7c2e90b4d1a8
+Create Date: 2026-10-17 21:03:15.482917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f5b2c6e18'
+down_revision = '7c2e90b4d1a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Without AUTOINCREMENT SQLite hands out max(id) + 1, so once the newest orders are deleted or
+    # archived a new order can take an id that orders_archive already holds. Other databases
+    # never reuse sequence values.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('orders', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+    # Start the sequence above every id ever used, archived ones included
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'orders'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', MAX("
+        "(SELECT COALESCE(MAX(id), 0) FROM orders), (SELECT COALESCE(MAX(id), 0) FROM orders_archive))"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('orders', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
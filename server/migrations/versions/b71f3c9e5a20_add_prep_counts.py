@@ -0,0 +1,39 @@
+"""add prep counts
+
+Revision ID: b71f3c9e5a20
+Revises: 5d0c7e21a9f4
+Create Date: 2026-10-17 17:25:44.902318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71f3c9e5a20'
+down_revision = '5d0c7e21a9f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('prep_counts',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('meal_option_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date', 'meal_option_id', 'status')
+    )
+    # Backfill the counters from existing orders
+    op.execute(
+        "INSERT INTO prep_counts (date, meal_option_id, status, quantity, order_count) "
+        "SELECT date, meal_option_id, COALESCE(status, 'Pending'), COALESCE(SUM(quantity), 0), COUNT(id) "
+        "FROM orders "
+        "WHERE date IS NOT NULL AND meal_option_id IS NOT NULL "
+        "GROUP BY date, meal_option_id, COALESCE(status, 'Pending')"
+    )
+
+
+def downgrade():
+    op.drop_table('prep_counts')
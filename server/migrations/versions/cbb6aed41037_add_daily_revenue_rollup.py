@@ -0,0 +1,37 @@
+"""add daily revenue rollup
+
+Revision ID: cbb6aed41037
+Revises: 68a13edb97d9
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cbb6aed41037'
+down_revision = '68a13edb97d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_revenue',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('total_revenue', sa.Float(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+    # Backfill the rollup from existing orders
+    op.execute(
+        "INSERT INTO daily_revenue (date, total_revenue, order_count) "
+        "SELECT orders.date, SUM(orders.quantity * meal_options.price), COUNT(orders.id) "
+        "FROM orders JOIN meal_options ON orders.meal_option_id = meal_options.id "
+        "WHERE orders.date IS NOT NULL "
+        "GROUP BY orders.date"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_revenue')
@@ -0,0 +1,39 @@
+"""add order events
+
+Revision ID: d5e1c8a7b234
+Revises: a93f5b2c6e18
+Create Date: 2026-10-17 23:41:08.119624
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e1c8a7b234'
+down_revision = 'a93f5b2c6e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('order_events', schema=None) as batch_op:
+        batch_op.create_index('ix_order_events_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_order_events_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_events_created_at')
+        batch_op.drop_index('ix_order_events_user_id_id')
+
+    op.drop_table('order_events')
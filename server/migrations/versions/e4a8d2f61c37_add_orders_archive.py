@@ -0,0 +1,44 @@
+"""add orders archive
+
+Revision ID: e4a8d2f61c37
+Revises: b71f3c9e5a20
+Create Date: 2026-10-17 18:04:51.663420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a8d2f61c37'
+down_revision = 'b71f3c9e5a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('meal_option_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('unit_price', sa.Float(), nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['meal_option_id'], ['meal_options.id'], name=op.f('fk_orders_archive_meal_option_id_meal_options')),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_orders_archive_user_id_users')),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_archive_user_id_date', ['user_id', 'date'], unique=False)
+        batch_op.create_index('ix_orders_archive_date', ['date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_archive_date')
+        batch_op.drop_index('ix_orders_archive_user_id_date')
+
+    op.drop_table('orders_archive')
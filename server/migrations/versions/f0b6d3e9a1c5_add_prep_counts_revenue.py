@@ -0,0 +1,37 @@
+"""add revenue to prep counts
+
+Revision ID: f0b6d3e9a1c5
+Revises: d5e1c8a7b234
+Create Date: 2026-10-18 00:27:44.905318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0b6d3e9a1c5'
+down_revision = 'd5e1c8a7b234'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('prep_counts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('revenue', sa.Float(), nullable=False, server_default='0'))
+    # Rebuild the counters from live and archived orders in one pass (as rebuild_prep_board does)
+    op.execute("DELETE FROM prep_counts")
+    op.execute(
+        "INSERT INTO prep_counts (date, meal_option_id, status, quantity, order_count, revenue) "
+        "SELECT date, meal_option_id, COALESCE(status, 'Pending'), COALESCE(SUM(quantity), 0), COUNT(id), "
+        "COALESCE(SUM(total_price), 0) "
+        "FROM (SELECT id, date, meal_option_id, status, quantity, total_price FROM orders "
+        "UNION ALL SELECT id, date, meal_option_id, status, quantity, total_price FROM orders_archive) AS all_orders "
+        "WHERE date IS NOT NULL AND meal_option_id IS NOT NULL "
+        "GROUP BY date, meal_option_id, COALESCE(status, 'Pending')"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('prep_counts', schema=None) as batch_op:
+        batch_op.drop_column('revenue')
@@ -6,7 +6,9 @@ from sqlalchemy import Table, Column, Integer, ForeignKey
 # Association table for many-to-many relationship between MealOption and Menu
 meal_menu = Table('meal_menu', db.metadata,
     Column('meal_option_id', Integer, ForeignKey('meal_options.id'), primary_key=True),
-    Column('menu_id', Integer, ForeignKey('menus.id'), primary_key=True)
+    Column('menu_id', Integer, ForeignKey('menus.id'), primary_key=True),
+    # The primary key leads with meal_option_id; menu -> meals lookups need their own index
+    db.Index('ix_meal_menu_menu_id', 'menu_id')
 )
 
 class User(db.Model, SerializerMixin):
@@ -67,6 +69,15 @@ class Menu(db.Model, SerializerMixin):
 
 class Order(db.Model, SerializerMixin):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_id_date', 'user_id', 'date'),
+        db.Index('ix_orders_date_status', 'date', 'status'),
+        db.Index('ix_orders_meal_option_id', 'meal_option_id'),
+        db.Index('ix_orders_status', 'status'),
+        # Ids are never reused, even after the newest orders are deleted or archived (SQLite
+        # otherwise hands out max(id) + 1 and could repeat an id kept in orders_archive)
+        {'sqlite_autoincrement': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -74,16 +85,19 @@ class Order(db.Model, SerializerMixin):
     date = db.Column(db.Date, default=datetime.utcnow)
     quantity = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(50), default='Pending')
+    # Price snapshot taken when the order is placed or changed, so totals never need meal_options
+    unit_price = db.Column(db.Float, nullable=False)
+    total_price = db.Column(db.Float, nullable=False)
 
     # Relationships to User and MealOption
     user = db.relationship('User', back_populates='orders')
     meal_option = db.relationship('MealOption', back_populates='orders')
 
-    serialize_only = ('id', 'user_id', 'meal_option_id', 'date', 'quantity', 'total_price', 'status')
+    serialize_only = ('id', 'user_id', 'meal_option_id', 'date', 'quantity', 'unit_price', 'total_price', 'status')
 
-    @property
-    def total_price(self):
-        return self.quantity * self.meal_option.price
+    def set_price(self, unit_price):
+        self.unit_price = unit_price
+        self.total_price = unit_price * self.quantity
 
     def to_dict(self):
         return {
@@ -94,3 +108,87 @@ class Order(db.Model, SerializerMixin):
             'totalPrice': self.total_price,
             'status': self.status
         }
+
+class ArchivedOrder(db.Model, SerializerMixin):
+    __tablename__ = 'orders_archive'
+    __table_args__ = (
+        db.Index('ix_orders_archive_user_id_date', 'user_id', 'date'),
+        db.Index('ix_orders_archive_date', 'date'),
+    )
+
+    # Finished orders moved out of `orders` by `flask archive-orders` (see archive.py); ids are kept
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    meal_option_id = db.Column(db.Integer, db.ForeignKey('meal_options.id'), nullable=False)
+    date = db.Column(db.Date)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(50))
+    unit_price = db.Column(db.Float, nullable=False)
+    total_price = db.Column(db.Float, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    serialize_only = ('id', 'user_id', 'meal_option_id', 'date', 'quantity', 'unit_price', 'total_price', 'status')
+
+class DailyRevenue(db.Model, SerializerMixin):
+    __tablename__ = 'daily_revenue'
+
+    # Rollup of orders per day, maintained by the order write paths (see revenue.py)
+    date = db.Column(db.Date, primary_key=True)
+    total_revenue = db.Column(db.Float, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+
+    serialize_only = ('date', 'total_revenue', 'order_count')
+
+    def to_dict(self):
+        return {
+            'date': self.date.strftime('%Y-%m-%d'),
+            'totalRevenue': self.total_revenue,
+            'orderCount': self.order_count
+        }
+
+class PrepCount(db.Model, SerializerMixin):
+    __tablename__ = 'prep_counts'
+
+    # Quantity, order count and revenue per day, meal and status, maintained by the order write paths
+    # (see prep_board.py); read by the prep board and by revenue analytics
+    date = db.Column(db.Date, primary_key=True)
+    meal_option_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    serialize_only = ('date', 'meal_option_id', 'status', 'quantity', 'order_count', 'revenue')
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.Index('ix_idempotency_keys_created_at', 'created_at'),
+    )
+
+    # Responses stored per (user, Idempotency-Key) so client retries are replayed (see idempotency.py).
+    # status_code is NULL while the first request is still running.
+    user_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    body = db.Column(db.LargeBinary)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class StoredOrderEvent(db.Model):
+    __tablename__ = 'order_events'
+    __table_args__ = (
+        db.Index('ix_order_events_user_id_id', 'user_id', 'id'),
+        db.Index('ix_order_events_created_at', 'created_at'),
+        # Ids are the Last-Event-ID clients resume from, so they must never be handed out twice
+        {'sqlite_autoincrement': True},
+    )
+
+    # Order events for Server-Sent Events, written in the transaction that changes the order. Every
+    # server process tails this table, so a stream gets events committed by any process and a
+    # reconnecting client resumes from the same ids wherever it lands (see order_events.py).
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
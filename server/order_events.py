@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from config import db
+from flask import current_app, has_app_context
+from models import StoredOrderEvent
+from sqlalchemy import delete, event, func, insert, select
+
+# Events read from the log per query while tailing
+TAIL_BATCH = 1000
+# How often (seconds) a process deletes events older than the retention period
+PRUNE_INTERVAL = 60
+
+# Raised when the process already holds as many open streams as it allows
+class TooManyStreams(Exception):
+    pass
+
+# An order event delivered to subscribers; `id` is what clients echo back as Last-Event-ID
+class OrderEvent:
+    __slots__ = ('id', 'name', 'data')
+
+    def __init__(self, event_id, name, data):
+        self.id = event_id
+        self.name = name
+        self.data = data
+
+# One open stream. Events queue up in a bounded buffer; if a slow client lets it overflow,
+# the oldest events are dropped and the client is told to resync instead. Events up to `after`
+# (the newest id the client already has) are skipped.
+class Subscription:
+    def __init__(self, user_id, buffer_size, after=0):
+        self.user_id = user_id
+        self.after = after
+        self._events = deque(maxlen=buffer_size)
+        self._ready = threading.Condition()
+        self.overflowed = False
+
+    def push(self, event):
+        with self._ready:
+            if event.id is not None:
+                if event.id <= self.after:
+                    return
+                self.after = event.id
+            if len(self._events) == self._events.maxlen:
+                self.overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+
+    # Wait up to `timeout` seconds; returns the pending events (empty on timeout)
+    def wait(self, timeout):
+        with self._ready:
+            if not self._events and not self.overflowed:
+                self._ready.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        if overflowed:
+            events.insert(0, OrderEvent(None, 'resync', {}))
+        return events
+
+# Add order events, (user id, name, data) tuples, to the current transaction. They reach streams
+# in every process once it commits, and never if it rolls back.
+def record_order_events(events):
+    now = datetime.utcnow()
+    rows = [{'user_id': user_id, 'name': name, 'data': data, 'created_at': now} for user_id, name, data in events]
+    if rows:
+        db.session.execute(insert(StoredOrderEvent), rows)
+        db.session.info['order_events_written'] = True
+
+# This process's streams need not wait for the next poll to see its own commits
+@event.listens_for(db.session, 'after_commit')
+def wake_after_commit(session):
+    if session.info.pop('order_events_written', False) and has_app_context():
+        hub = current_app.extensions.get('order_events')
+        if hub is not None:
+            hub.wake()
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_after_rollback(session):
+    session.info.pop('order_events_written', None)
+
+# Id of the newest event in the table (0 while it is empty)
+def last_event_id_in(connection):
+    return connection.scalar(select(func.max(StoredOrderEvent.id))) or 0
+
+# Fans order events out to this process's streams, per user. Events come from the order_events
+# table (written by record_order_events in any process), which a background thread tails every
+# `poll_seconds` while streams are open. Event ids are the table's, so a client reconnecting to
+# any process resumes from its Last-Event-ID; if the events after it are no longer all in the
+# table (or more than `history_size` of them), it gets a `resync` event and should refetch
+# GET /api/orders. Every open stream holds a request thread, so at most `max_streams` are open.
+class OrderEventHub:
+    def __init__(self, app, buffer_size=100, history_size=50, max_streams=4, poll_seconds=0.5,
+                 retention=timedelta(hours=1)):
+        self.app = app
+        self.buffer_size = buffer_size
+        self.history_size = history_size
+        self.max_streams = max_streams
+        self.poll_seconds = poll_seconds
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._streams = 0
+        # Id of the newest event read from the table
+        self._cursor = 0
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pruned_at = 0
+
+    # The tailing thread starts on first use so it is created in the serving process, after any fork
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='order-events', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def subscribe(self, user_id, last_event_id=None):
+        self._ensure_started()
+        with self._lock:
+            if self._streams >= self.max_streams:
+                raise TooManyStreams()
+            with db.engine.connect() as connection:
+                if not self._subscribers:
+                    # Nothing was tailed while nobody listened: start from the end of the table
+                    self._cursor = last_event_id_in(connection)
+                subscription = Subscription(user_id, self.buffer_size, after=self._cursor)
+                if last_event_id is not None:
+                    self._replay(connection, subscription, last_event_id)
+            self._streams += 1
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    # Queue the user's events after `last_event_id` up to the cursor; the tailing thread delivers
+    # the later ones. Ask for a resync when that range is not fully in the table.
+    def _replay(self, connection, subscription, last_event_id):
+        if last_event_id > self._cursor:
+            # Newer than what this process has read; unknown to the table means the client's id
+            # does not come from it (e.g. the database was replaced)
+            if last_event_id > last_event_id_in(connection):
+                subscription.overflowed = True
+            else:
+                subscription.after = last_event_id
+            return
+        subscription.after = last_event_id
+        oldest = connection.scalar(select(func.min(StoredOrderEvent.id)))
+        if oldest is not None and last_event_id < oldest - 1:
+            subscription.overflowed = True
+            return
+        rows = connection.execute(
+            select(StoredOrderEvent.id, StoredOrderEvent.name, StoredOrderEvent.data)
+            .where(StoredOrderEvent.user_id == subscription.user_id,
+                   StoredOrderEvent.id > last_event_id, StoredOrderEvent.id <= self._cursor)
+            .order_by(StoredOrderEvent.id)
+            .limit(self.history_size + 1)
+        ).all()
+        if len(rows) > self.history_size:
+            subscription.overflowed = True
+            rows = rows[-self.history_size:]
+        for event_id, name, data in rows:
+            subscription.push(OrderEvent(event_id, name, data))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None and subscription in subscribers:
+                self._streams -= 1
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._streams
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            try:
+                with self.app.app_context(), db.engine.connect() as connection:
+                    if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL:
+                        self._prune(connection)
+                    with self._lock:
+                        listening = bool(self._subscribers)
+                        after = self._cursor
+                    if listening:
+                        self._tail(connection, after)
+            except Exception:
+                self.app.logger.exception('Reading order events failed')
+
+    # Deliver events committed after `after` to the streams of their users
+    def _tail(self, connection, after):
+        rows = connection.execute(
+            select(StoredOrderEvent.id, StoredOrderEvent.user_id, StoredOrderEvent.name, StoredOrderEvent.data)
+            .where(StoredOrderEvent.id > after)
+            .order_by(StoredOrderEvent.id)
+            .limit(TAIL_BATCH)
+        ).all()
+        if not rows:
+            return
+        deliveries = []
+        with self._lock:
+            self._cursor = max(self._cursor, rows[-1].id)
+            for event_id, user_id, name, data in rows:
+                for subscription in self._subscribers.get(user_id, ()):
+                    deliveries.append((subscription, OrderEvent(event_id, name, data)))
+        for subscription, order_event in deliveries:
+            subscription.push(order_event)
+        if len(rows) == TAIL_BATCH:
+            self._wake.set()
+
+    # Drop events past the retention period; the newest one always stays, so the table keeps
+    # knowing the last id it handed out
+    def _prune(self, connection):
+        self._pruned_at = time.monotonic()
+        connection.execute(
+            delete(StoredOrderEvent).where(
+                StoredOrderEvent.created_at < datetime.utcnow() - self.retention,
+                StoredOrderEvent.id < select(func.max(StoredOrderEvent.id)).scalar_subquery()
+            )
+        )
+        connection.commit()
@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+
+from config import db
+from prep_board import record_prep
+from revenue import record_revenue
+
+# Raised to the request thread when its batch did not become durable in time
+class OrderWriteTimeout(Exception):
+    pass
+
+# One order waiting for its batch to commit
+class PendingOrder:
+    def __init__(self, order):
+        self.order = order
+        self.order_id = None
+        self.error = None
+        self.done = threading.Event()
+
+# Group commit for order placement: request threads hand transient Order objects to a single
+# writer thread, which inserts them in batches of up to `max_batch` (or whatever arrived within
+# `max_wait_ms` of the first one) with one commit per batch. Each request blocks until its
+# batch is durable, so it still answers with the real order id.
+class GroupCommitWriter:
+    def __init__(self, app, max_batch=64, max_wait_ms=5, timeout=10):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    # The writer thread starts on first use so it is created in the serving process, after any fork
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='order-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, order):
+        self._ensure_started()
+        pending = PendingOrder(order)
+        self._queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            raise OrderWriteTimeout()
+        if pending.error is not None:
+            raise pending.error
+        return pending.order_id
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            with self.app.app_context():
+                try:
+                    self._commit(batch)
+                except Exception:
+                    db.session.rollback()
+                    # Retry one by one so a single bad order doesn't fail the whole batch
+                    for pending in batch:
+                        try:
+                            self._commit([pending])
+                        except Exception as error:
+                            db.session.rollback()
+                            pending.error = error
+                finally:
+                    db.session.remove()
+            for pending in batch:
+                pending.done.set()
+
+    def _commit(self, batch):
+        orders = [pending.order for pending in batch]
+        db.session.add_all(orders)
+        db.session.flush()
+        revenue = {}
+        for order in orders:
+            total, count = revenue.get(order.date, (0, 0))
+            revenue[order.date] = (total + order.total_price, count + 1)
+        for order_date, (total, count) in revenue.items():
+            record_revenue(order_date, total, count)
+        prep = {}
+        for order in orders:
+            key = (order.date, order.meal_option_id, order.status)
+            quantity, count, total = prep.get(key, (0, 0, 0))
+            prep[key] = (quantity + order.quantity, count + 1, total + order.total_price)
+        for (order_date, meal_option_id, status), (quantity, count, total) in prep.items():
+            record_prep(order_date, meal_option_id, status, quantity, count, total)
+        ids = [order.id for order in orders]
+        db.session.commit()
+        for pending, order_id in zip(batch, ids):
+            pending.order_id = order_id
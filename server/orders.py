@@ -0,0 +1,181 @@
+import csv
+import io
+import json
+
+from analytics import mark_orders_changed
+from config import db
+from flask import current_app
+from models import MealOption, Order, User
+from prep_board import forget_orders_prep, move_orders_prep
+from revenue import forget_orders_revenue
+from sqlalchemy import delete, select, update
+
+# Upper bound for a single keyset page of /api/orders/admin
+MAX_PAGE_SIZE = 500
+# Rows fetched per round trip when streaming orders
+STREAM_BATCH_SIZE = 1000
+# Ids per IN (...) clause, well under SQLite's default limit of 999 bound variables
+IN_CHUNK_SIZE = 500
+
+def chunked(ids, size=IN_CHUNK_SIZE):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+# Column-only query for order listings: no ORM identity map, no lazy loads
+def order_listing_query(status=None, start=None, end=None, after=None, order_ids=None):
+    query = (
+        select(Order.id, User.username, MealOption.name, Order.quantity, Order.total_price, Order.status)
+        .join(User, Order.user_id == User.id)
+        .join(MealOption, Order.meal_option_id == MealOption.id)
+    )
+    if status:
+        query = query.where(Order.status == status)
+    if start:
+        query = query.where(Order.date >= start)
+    if end:
+        query = query.where(Order.date <= end)
+    if after is not None:
+        query = query.where(Order.id > after)
+    if order_ids is not None:
+        query = query.where(Order.id.in_(order_ids))
+    return query.order_by(Order.id)
+
+# A customer's own orders with meal name and the price they were placed at.
+# `orders` is the table to read from (see archive.order_source).
+def user_orders_query(user_id, start=None, end=None, orders=Order.__table__):
+    query = (
+        select(orders.c.id, MealOption.name, orders.c.unit_price, orders.c.quantity, orders.c.status, orders.c.total_price)
+        .join(MealOption, orders.c.meal_option_id == MealOption.id)
+        .where(orders.c.user_id == user_id)
+    )
+    if start:
+        query = query.where(orders.c.date >= start)
+    if end:
+        query = query.where(orders.c.date <= end)
+    return query.order_by(orders.c.id)
+
+# Columns of an accounting export, in order
+EXPORT_COLUMNS = ('id', 'date', 'user', 'email', 'meal', 'unitPrice', 'quantity', 'totalPrice', 'status')
+
+# Flat export rows: only the joined columns accounting needs, oldest first.
+# `orders` is the table to read from (see archive.order_source).
+def order_export_query(status=None, start=None, end=None, orders=Order.__table__):
+    query = (
+        select(orders.c.id, orders.c.date, User.username, User.email, MealOption.name,
+               orders.c.unit_price, orders.c.quantity, orders.c.total_price, orders.c.status)
+        .join(User, orders.c.user_id == User.id)
+        .join(MealOption, orders.c.meal_option_id == MealOption.id)
+    )
+    if status:
+        query = query.where(orders.c.status == status)
+    if start:
+        query = query.where(orders.c.date >= start)
+    if end:
+        query = query.where(orders.c.date <= end)
+    return query.order_by(orders.c.id)
+
+def export_row_values(row):
+    order_id, order_date, username, email, meal_name, unit_price, quantity, total_price, status = row
+    return (order_id, order_date.isoformat() if order_date else None, username, email, meal_name,
+            unit_price, quantity, total_price, status)
+
+# Yield the export as CSV text, one chunk per batch read from a server-side cursor
+def stream_orders_csv(query, batch_size=STREAM_BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        writer.writerows(export_row_values(row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+# Yield the export as newline-delimited JSON, one object per order
+def stream_orders_ndjson(query, batch_size=STREAM_BATCH_SIZE):
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, export_row_values(row))), separators=(',', ':')) + '\n' for row in rows
+        )
+
+# Same shape as Order.to_dict(), built from a listing row
+def order_row_to_dict(row):
+    order_id, username, meal_name, quantity, total_price, status = row
+    return {
+        'id': order_id,
+        'user': username,
+        'meal': meal_name,
+        'quantity': quantity,
+        'totalPrice': total_price,
+        'status': status
+    }
+
+# Fetch one keyset page; returns the orders and the cursor for the next page (None on the last page)
+def order_page(query, limit):
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return [order_row_to_dict(row) for row in rows[:limit]], next_cursor
+
+# Yield {"orders": [...]} as JSON text, reading the query in batches from a server-side cursor
+def stream_orders_json(query, batch_size=STREAM_BATCH_SIZE):
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    yield '{"orders": ['
+    first = True
+    for rows in result.partitions():
+        chunk = ', '.join(current_app.json.dumps(order_row_to_dict(row)) for row in rows)
+        yield chunk if first else ', ' + chunk
+        first = False
+    yield ']}'
+
+# Apply {order_id: status} with one UPDATE ... WHERE id IN (...) per status and chunk. Orders
+# already in their new status are left alone. Returns the number of rows updated and
+# (order_id, user_id, status) for each of them.
+def bulk_update_status(statuses):
+    ids_by_status = {}
+    for order_id, status in statuses.items():
+        ids_by_status.setdefault(status, []).append(order_id)
+    updated = 0
+    changes = []
+    for status, order_ids in ids_by_status.items():
+        for chunk in chunked(sorted(order_ids)):
+            owners = db.session.execute(
+                select(Order.id, Order.user_id, Order.date)
+                .where(Order.id.in_(chunk), Order.status.is_distinct_from(status))
+            ).all()
+            if not owners:
+                continue
+            changed = [order_id for order_id, _, _ in owners]
+            changes.extend((order_id, user_id, status) for order_id, user_id, _ in owners)
+            for order_date in {order_date for _, _, order_date in owners}:
+                mark_orders_changed(order_date)
+            move_orders_prep(changed, status)
+            result = db.session.execute(
+                update(Order).where(Order.id.in_(changed)).values(status=status),
+                execution_options={'synchronize_session': False}
+            )
+            updated += result.rowcount
+    return updated, changes
+
+# Delete orders with one DELETE per chunk, keeping the revenue rollup and prep counters in step; returns rows deleted
+def bulk_delete(order_ids):
+    deleted = 0
+    for chunk in chunked(sorted(set(order_ids))):
+        forget_orders_revenue(chunk)
+        forget_orders_prep(chunk)
+        result = db.session.execute(
+            delete(Order).where(Order.id.in_(chunk)),
+            execution_options={'synchronize_session': False}
+        )
+        deleted += result.rowcount
+    return deleted
+
+# Listing rows for a set of order ids, fetched chunk by chunk
+def orders_by_ids(order_ids):
+    orders = []
+    for chunk in chunked(sorted(set(order_ids))):
+        orders.extend(order_row_to_dict(row) for row in db.session.execute(order_listing_query(order_ids=chunk)))
+    return orders
@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Raised when the hashing pool already has as much work as it is allowed to hold
+class HasherBusy(Exception):
+    pass
+
+# Cost factor encoded in a bcrypt hash: $2b$<rounds>$<salt+hash>
+def hash_rounds(pw_hash):
+    try:
+        return int(pw_hash.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+# Runs bcrypt hashing/verification on a dedicated, size-bounded thread pool so CPU-bound
+# work at a login spike cannot occupy every request thread. Once `max_pending` jobs are
+# running or queued, new work is rejected immediately with HasherBusy.
+class PasswordHasher:
+    def __init__(self, bcrypt, rounds, workers, max_pending):
+        self.bcrypt = bcrypt
+        self.rounds = rounds
+        # Pool threads start on first use, so a server that forks after create_app() gets them per worker
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(self.bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        return self._run(self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        return hash_rounds(pw_hash) != self.rounds
@@ -0,0 +1,85 @@
+from archive import order_source
+from config import db
+from models import MealOption, Order, PrepCount
+from revenue import add_to_rollup
+from sqlalchemy import delete, func, insert, select
+
+# Orders in these statuses no longer need cooking
+NOT_TO_PREPARE = ('Cancelled',)
+
+# Orders created before statuses were always set count as Pending
+def prep_status(status):
+    return status or 'Pending'
+
+# Add a quantity/order count/revenue delta to the counter for (day, meal, status).
+# Runs inside the caller's transaction so the counter commits (or rolls back) with the order.
+def record_prep(order_date, meal_option_id, status, quantity, count, revenue):
+    if not quantity and not count and not revenue:
+        return
+    add_to_rollup(
+        PrepCount,
+        {'date': order_date, 'meal_option_id': meal_option_id, 'status': prep_status(status)},
+        {'quantity': quantity, 'order_count': count, 'revenue': revenue}
+    )
+
+# Per (day, meal, status) quantity, order count and revenue of a set of orders
+def orders_prep_query(order_ids):
+    return (
+        select(Order.date, Order.meal_option_id, Order.status, func.sum(Order.quantity), func.count(Order.id),
+               func.sum(Order.total_price))
+        .where(Order.id.in_(order_ids))
+        .group_by(Order.date, Order.meal_option_id, Order.status)
+    )
+
+# Remove a set of orders from the prep counters, aggregated in a single query
+def forget_orders_prep(order_ids):
+    for order_date, meal_option_id, status, quantity, count, revenue in db.session.execute(orders_prep_query(order_ids)).all():
+        record_prep(order_date, meal_option_id, status, -quantity, -count, -revenue)
+
+# Move a set of orders to `new_status` in the prep counters; call before updating the orders
+def move_orders_prep(order_ids, new_status):
+    for order_date, meal_option_id, status, quantity, count, revenue in db.session.execute(orders_prep_query(order_ids)).all():
+        if prep_status(status) != prep_status(new_status):
+            record_prep(order_date, meal_option_id, status, -quantity, -count, -revenue)
+            record_prep(order_date, meal_option_id, new_status, quantity, count, revenue)
+
+# Recompute every counter from live and archived orders with a GROUP BY in the database
+def rebuild_prep_board():
+    orders = order_source(include_archive=True)
+    status = func.coalesce(orders.c.status, 'Pending')
+    db.session.execute(delete(PrepCount))
+    db.session.execute(
+        insert(PrepCount).from_select(
+            ['date', 'meal_option_id', 'status', 'quantity', 'order_count', 'revenue'],
+            select(orders.c.date, orders.c.meal_option_id, status,
+                   func.coalesce(func.sum(orders.c.quantity), 0), func.count(orders.c.id),
+                   func.coalesce(func.sum(orders.c.total_price), 0))
+            .where(orders.c.date.isnot(None), orders.c.meal_option_id.isnot(None))
+            .group_by(orders.c.date, orders.c.meal_option_id, status)
+        )
+    )
+    db.session.commit()
+
+# The counters for `on_date`, with meal names: one indexed query
+def prep_board_query(on_date):
+    return (
+        select(PrepCount.meal_option_id, MealOption.name, PrepCount.status, PrepCount.quantity, PrepCount.order_count)
+        .outerjoin(MealOption, MealOption.id == PrepCount.meal_option_id)
+        .where(PrepCount.date == on_date, PrepCount.order_count > 0)
+        .order_by(PrepCount.meal_option_id, PrepCount.status)
+    )
+
+# What the kitchen has to cook on `on_date`: per meal, the quantity still to prepare and a
+# breakdown by status
+def prep_board(on_date):
+    rows = db.session.execute(prep_board_query(on_date)).all()
+    meals = {}
+    for meal_option_id, name, status, quantity, count in rows:
+        meal = meals.setdefault(meal_option_id, {
+            'mealOptionId': meal_option_id, 'meal': name, 'quantity': 0, 'orders': 0, 'byStatus': {}
+        })
+        meal['byStatus'][status] = {'quantity': quantity, 'orders': count}
+        if status not in NOT_TO_PREPARE:
+            meal['quantity'] += quantity
+            meal['orders'] += count
+    return {'date': str(on_date), 'meals': list(meals.values())}
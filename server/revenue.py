@@ -0,0 +1,75 @@
+from analytics import mark_orders_changed
+from archive import order_source
+from config import db
+from models import DailyRevenue, Order
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects that support INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+# Add `deltas` to the rollup row of `model` identified by `keys`, creating the row if needed.
+# Runs inside the caller's transaction so the rollup commits (or rolls back) with the order.
+def add_to_rollup(model, keys, deltas):
+    increments = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    dialect_insert = UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(model).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(index_elements=[getattr(model, name) for name in keys], set_=increments)
+        db.session.execute(stmt)
+        return
+
+    result = db.session.execute(
+        update(model)
+        .where(*(getattr(model, name) == value for name, value in keys.items()))
+        .values(increments)
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(model).values(**keys, **deltas))
+
+# Add a revenue/order count delta to the rollup row for a day
+def record_revenue(order_date, revenue, count):
+    if not revenue and not count:
+        return
+    mark_orders_changed(order_date)
+    add_to_rollup(DailyRevenue, {'date': order_date}, {'total_revenue': revenue, 'order_count': count})
+
+# Per-day revenue and order count of a set of orders
+def orders_revenue_query(order_ids):
+    return (
+        select(Order.date, func.sum(Order.total_price), func.count(Order.id))
+        .where(Order.id.in_(order_ids))
+        .group_by(Order.date)
+    )
+
+# Remove a set of orders from the rollup, aggregated per day in a single query
+def forget_orders_revenue(order_ids):
+    rows = db.session.execute(orders_revenue_query(order_ids)).all()
+    for order_date, revenue, count in rows:
+        record_revenue(order_date, -revenue, -count)
+
+# Recompute the whole rollup from live and archived orders with a GROUP BY in the database
+def rebuild_daily_revenue():
+    orders = order_source(include_archive=True)
+    db.session.execute(delete(DailyRevenue))
+    db.session.execute(
+        insert(DailyRevenue).from_select(
+            ['date', 'total_revenue', 'order_count'],
+            select(orders.c.date, func.sum(orders.c.total_price), func.count(orders.c.id))
+            .where(orders.c.date.isnot(None))
+            .group_by(orders.c.date)
+        )
+    )
+    db.session.commit()
+
+# Per-day revenue for an optional [start, end] window, read from the rollup
+def revenue_by_date(start=None, end=None):
+    query = select(DailyRevenue).where(DailyRevenue.order_count > 0)
+    if start:
+        query = query.where(DailyRevenue.date >= start)
+    if end:
+        query = query.where(DailyRevenue.date <= end)
+    return db.session.scalars(query.order_by(DailyRevenue.date)).all()
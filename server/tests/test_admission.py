@@ -0,0 +1,49 @@
+# Login is rate limited per submitted account and client address, and per address; register per address
+import pytest
+
+AUTH_LIMITS = {'auth': (0.001, 2)}
+
+
+def login(client, email, address=None):
+    headers = {'X-Forwarded-For': address} if address else {}
+    return client.post('/api/login', json={'email': email, 'password': 'wrong'}, headers=headers).status_code
+
+
+@pytest.fixture
+def limited_app(make_app):
+    return make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS=AUTH_LIMITS)
+
+
+def test_accounts_behind_one_address_have_separate_budgets(limited_app):
+    client = limited_app.test_client()
+    assert [login(client, 'a@example.com') for _ in range(3)] == [401, 401, 429]
+    assert login(client, 'b@example.com') == 401
+    # Case and surrounding spaces do not make a new account
+    assert login(client, ' A@Example.com') == 429
+
+
+def test_forwarded_address_is_used_only_behind_a_trusted_proxy(make_app, limited_app):
+    client = limited_app.test_client()
+    assert [login(client, 'a@example.com', f'203.0.113.{i}') for i in range(3)] == [401, 401, 429]
+
+    proxied = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS=AUTH_LIMITS, PROXY_FIX_X_FOR=1).test_client()
+    assert [login(proxied, 'a@example.com', f'203.0.113.{i}') for i in range(3)] == [401, 401, 401]
+    assert [login(proxied, 'a@example.com', '203.0.113.0') for _ in range(2)] == [401, 429]
+
+
+def test_one_address_cannot_spray_many_accounts(make_app):
+    client = make_app(RATE_LIMIT_ENABLED=True, RATE_LIMITS={**AUTH_LIMITS, 'auth_address': (0.001, 3)}).test_client()
+    assert [login(client, f'{i}@example.com') for i in range(4)] == [401, 401, 401, 429]
+    # Another address has its own budget
+    other = client.post('/api/login', json={'email': '4@example.com', 'password': 'wrong'},
+                        environ_base={'REMOTE_ADDR': '203.0.113.1'})
+    assert other.status_code == 401
+
+
+def test_register_is_limited_per_address_whatever_the_account(limited_app):
+    client = limited_app.test_client()
+    statuses = [
+        client.post('/api/register', json={'username': f'user{i}', 'email': f'{i}@example.com', 'password': 'secret'}).status_code
+        for i in range(3)
+    ]
+    assert statuses == [201, 201, 429]
@@ -0,0 +1,58 @@
+# Revenue analytics: read from the rollups, and invalidated for the days orders change
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+
+from archive import archive_orders, order_source
+from benchmarks.seed import seed
+from conftest import add_meal, add_order, add_user, auth_header
+from config import db
+from models import User
+
+
+def meals_in(response):
+    assert response.status_code == 200
+    return [meal['mealOptionId'] for meal in response.get_json()['byMeal']]
+
+
+def test_moving_an_order_to_a_same_price_meal_updates_analytics(app):
+    with app.app_context():
+        admin = auth_header(add_user('admin', is_admin=True))
+        user = add_user('user')
+        ugali, rice = add_meal('Ugali', 6.0), add_meal('Rice', 6.0)
+        order_id = add_order(user, ugali).id
+        ugali_id, rice_id = ugali.id, rice.id
+        headers = auth_header(user)
+
+    client = app.test_client()
+    assert meals_in(client.get('/api/revenue/analytics', headers=admin)) == [ugali_id]
+
+    update = client.put(f'/api/orders/{order_id}', json={'meal_option_id': rice_id}, headers=headers)
+    assert update.status_code == 200
+    assert meals_in(client.get('/api/revenue/analytics', headers=admin)) == [rice_id]
+
+
+# Cold ranges are read from the prep_counts rollup, never from orders or the archive, and still
+# match what the orders add up to
+def test_analytics_are_served_from_the_rollup(app):
+    with app.app_context():
+        seed(app.extensions['password_hasher'], users=5, meals=6, days=60, orders=300)
+        admin = auth_header(db.session.scalars(select(User).where(User.is_admin.is_(True))).one())
+        archive_orders(older_than_days=20)
+        orders = order_source(include_archive=True)
+        revenue, count = db.session.execute(
+            select(func.sum(orders.c.total_price), func.count(orders.c.id))
+            .where(orders.c.date >= date.today() - timedelta(days=59))
+        ).one()
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    response = app.test_client().get(f'/api/revenue/analytics?from={date.today() - timedelta(days=59)}', headers=admin)
+    assert response.status_code == 200
+    totals = response.get_json()['totals']
+    assert totals['orders'] == count
+    assert totals['revenue'] == pytest.approx(revenue)
+    assert not [sql for sql in statements if re.search(r'\borders(_archive)?\b', sql)]
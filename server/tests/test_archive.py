@@ -0,0 +1,36 @@
+# Archiving moves finished orders into orders_archive without ever letting an id be used twice
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from archive import archive_orders
+from conftest import add_meal, add_order, add_user
+from config import db
+from models import ArchivedOrder, Order
+
+
+def test_new_orders_never_reuse_archived_ids(app):
+    old = date.today() - timedelta(days=400)
+    with app.app_context():
+        user = add_user('user')
+        meal = add_meal('Ugali', 6.0)
+        ids = [add_order(user, meal, on=old, status='Completed').id for _ in range(3)]
+
+        # The newest order is archived too, leaving `orders` empty
+        assert archive_orders(older_than_days=365) == 3
+        assert db.session.scalar(select(func.count(Order.id))) == 0
+        assert sorted(db.session.scalars(select(ArchivedOrder.id))) == ids
+
+        assert add_order(user, meal).id > max(ids)
+
+
+def test_deleting_the_newest_order_does_not_free_its_id(app):
+    with app.app_context():
+        user = add_user('user')
+        meal = add_meal('Ugali', 6.0)
+        newest = add_order(user, meal)
+        newest_id = newest.id
+        db.session.delete(newest)
+        db.session.commit()
+
+        assert add_order(user, meal).id > newest_id
@@ -0,0 +1,25 @@
+# Login with the right password succeeds even when the hash upgrade after it cannot run
+from sqlalchemy import select
+
+from conftest import add_user
+from config import db
+from models import User
+from passwords import HasherBusy
+
+
+def test_login_succeeds_when_the_rehash_is_shed(app, monkeypatch):
+    with app.app_context():
+        old_hash = add_user('user', password='secret').password_hash
+    hasher = app.extensions['password_hasher']
+    # A new cost factor makes the stored hash due for an upgrade, but the pool has no room for it
+    monkeypatch.setattr(hasher, 'rounds', hasher.rounds + 1)
+
+    def busy(password):
+        raise HasherBusy()
+    monkeypatch.setattr(hasher, 'hash', busy)
+
+    response = app.test_client().post('/api/login', json={'email': 'user@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    assert response.get_json()['token']
+    with app.app_context():
+        assert db.session.scalars(select(User.password_hash).where(User.username == 'user')).one() == old_hash
@@ -0,0 +1,146 @@
+# Order status changes reach the user's open /api/orders/stream as Server-Sent Events
+from sqlalchemy import select
+
+from conftest import add_meal, add_order, add_user, auth_header
+from config import db
+from models import StoredOrderEvent
+
+
+# Reads the stream until an event named `name` arrives (or `limit` chunks have been read)
+def next_event(chunks, name, limit=50):
+    for _ in range(limit):
+        chunk = next(chunks).decode()
+        if f'event: {name}\n' in chunk:
+            return chunk
+    raise AssertionError(f'no {name} event')
+
+
+def test_status_change_is_streamed(make_app):
+    app = make_app(SSE_HEARTBEAT_SECONDS=0.1)
+    with app.app_context():
+        admin = auth_header(add_user('admin', is_admin=True))
+        user = add_user('user')
+        order_id = add_order(user, add_meal('Ugali', 6.0)).id
+        headers = auth_header(user)
+
+    client = app.test_client()
+    response = client.get('/api/orders/stream', headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = response.iter_encoded()
+    try:
+        assert next(chunks).decode() == 'retry: 3000\n\n'
+        update = client.put(f'/api/orders/{order_id}/status', json={'status': 'Ready'}, headers=admin)
+        assert update.status_code == 200
+
+        event = next_event(chunks, 'order_status')
+        assert f'data: {{"id":{order_id},"status":"Ready"}}' in event
+    finally:
+        response.close()
+    assert app.extensions['order_events'].subscriber_count() == 0
+
+
+def test_streams_are_capped_per_process(make_app):
+    app = make_app(SSE_MAX_STREAMS=1, SSE_RETRY_AFTER=7)
+    with app.app_context():
+        headers = auth_header(add_user('user'))
+
+    client = app.test_client()
+    first = client.get('/api/orders/stream', headers=headers, buffered=False)
+    assert first.status_code == 200
+    second = client.get('/api/orders/stream', headers=headers)
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '7'
+
+    first.close()
+    third = client.get('/api/orders/stream', headers=headers, buffered=False)
+    assert third.status_code == 200
+    third.close()
+
+
+def test_stream_ends_after_its_lifetime(make_app):
+    app = make_app(SSE_HEARTBEAT_SECONDS=0.05, SSE_MAX_LIFETIME_SECONDS=0.2)
+    with app.app_context():
+        headers = auth_header(add_user('user'))
+
+    response = app.test_client().get('/api/orders/stream', headers=headers, buffered=False)
+    chunks = list(response.iter_encoded())
+    assert chunks[0] == b'retry: 3000\n\n'
+    assert b': heartbeat\n\n' in chunks
+    response.close()
+    assert app.extensions['order_events'].subscriber_count() == 0
+
+
+# Two apps on one database stand in for two server processes
+def two_processes(make_app, tmp_path):
+    uri = f'sqlite:///{tmp_path}/shared.db'
+    first = make_app(SQLALCHEMY_DATABASE_URI=uri, SSE_HEARTBEAT_SECONDS=0.1, SSE_POLL_SECONDS=0.05)
+    second = make_app(SQLALCHEMY_DATABASE_URI=uri, SSE_HEARTBEAT_SECONDS=0.1, SSE_POLL_SECONDS=0.05)
+    with first.app_context():
+        admin = auth_header(add_user('admin', is_admin=True))
+        user = add_user('user')
+        order_id = add_order(user, add_meal('Ugali', 6.0)).id
+        headers = auth_header(user)
+    return first, second, admin, headers, order_id
+
+
+def test_status_change_reaches_a_stream_in_another_process(make_app, tmp_path):
+    first, second, admin, headers, order_id = two_processes(make_app, tmp_path)
+    response = second.test_client().get('/api/orders/stream', headers=headers, buffered=False)
+    chunks = response.iter_encoded()
+    try:
+        next(chunks)
+        update = first.test_client().put(f'/api/orders/{order_id}/status', json={'status': 'Ready'}, headers=admin)
+        assert update.status_code == 200
+        assert '"status":"Ready"' in next_event(chunks, 'order_status')
+    finally:
+        response.close()
+
+
+def test_reconnecting_to_another_process_replays_missed_events(make_app, tmp_path):
+    first, second, admin, headers, order_id = two_processes(make_app, tmp_path)
+    client = first.test_client()
+    for status in ('Preparing', 'Ready', 'Completed'):
+        client.put(f'/api/orders/{order_id}/status', json={'status': status}, headers=admin)
+
+    response = second.test_client().get('/api/orders/stream', headers={**headers, 'Last-Event-ID': '1'}, buffered=False)
+    chunks = response.iter_encoded()
+    try:
+        next(chunks)
+        assert 'id: 2\n' in next_event(chunks, 'order_status')
+        assert 'id: 3\n' in next_event(chunks, 'order_status')
+    finally:
+        response.close()
+
+
+def test_unknown_last_event_id_gets_a_resync(make_app, tmp_path):
+    first, second, admin, headers, order_id = two_processes(make_app, tmp_path)
+    first.test_client().put(f'/api/orders/{order_id}/status', json={'status': 'Ready'}, headers=admin)
+
+    # An id the database never issued, e.g. from before it was replaced
+    response = second.test_client().get('/api/orders/stream', headers={**headers, 'Last-Event-ID': '99'}, buffered=False)
+    chunks = response.iter_encoded()
+    try:
+        next(chunks)
+        next_event(chunks, 'resync')
+        first.test_client().put(f'/api/orders/{order_id}/status', json={'status': 'Completed'}, headers=admin)
+        assert '"status":"Completed"' in next_event(chunks, 'order_status')
+    finally:
+        response.close()
+
+
+def test_unchanged_status_is_not_published(app):
+    with app.app_context():
+        admin = auth_header(add_user('admin', is_admin=True))
+        user, meal = add_user('user'), add_meal('Ugali', 6.0)
+        ready, pending = add_order(user, meal, status='Ready').id, add_order(user, meal).id
+
+    client = app.test_client()
+    assert client.put(f'/api/orders/{ready}/status', json={'status': 'Ready'}, headers=admin).status_code == 200
+    bulk = client.put('/api/orders/status', headers=admin, json=[
+        {'order_id': ready, 'status': 'Ready'}, {'order_id': pending, 'status': 'Ready'},
+    ])
+    assert bulk.get_json()['updated'] == 1
+    with app.app_context():
+        events = db.session.execute(select(StoredOrderEvent.name, StoredOrderEvent.data)).all()
+    assert events == [('order_status', {'id': pending, 'status': 'Ready'})]
@@ -0,0 +1,67 @@
+# Order listings: a fixed number of statements however many orders there are, and strict paging parameters
+import pytest
+from sqlalchemy import func, select
+
+from benchmarks.common import count_statements
+from benchmarks.seed import seed
+from conftest import add_meal, add_order, add_user, auth_header
+from config import db
+from models import Order, User
+
+ORDERS = 200
+
+
+# Seeds `orders` orders, then counts the statements run by one GET of `path`, made as the user
+# with the most orders (or the admin).
+# A first request warms the identity cache and connection pool so only the listing is counted.
+def statements_for(app, orders, path, admin):
+    with app.app_context():
+        seed(app.extensions['password_hasher'], users=5, meals=10, days=30, orders=orders)
+        if admin:
+            user = db.session.scalars(select(User).where(User.is_admin.is_(True))).one()
+        else:
+            user = db.session.scalars(
+                select(User).join(Order).group_by(User.id).order_by(func.count(Order.id).desc())
+            ).first()
+        headers = auth_header(user)
+
+    client = app.test_client()
+    assert client.get(path, headers=headers).status_code == 200
+    with app.app_context(), count_statements(db.engine) as counter:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['orders']
+    return counter.count
+
+
+@pytest.mark.parametrize('path, admin', [
+    ('/api/orders', False),
+    ('/api/orders/admin', True),
+    ('/api/orders/admin?limit=1000', True),
+])
+def test_order_listing_statements_do_not_grow_with_orders(make_app, path, admin):
+    small = statements_for(make_app(), ORDERS, path, admin)
+    large = statements_for(make_app(), 4 * ORDERS, path, admin)
+    assert small == large
+
+
+@pytest.mark.parametrize('query', ['limit=ten', 'limit=-5', 'limit=1.5', 'after=abc', 'after=-1', 'limit=10&after=1e3'])
+def test_admin_listing_rejects_malformed_paging(app, query):
+    with app.app_context():
+        headers = auth_header(add_user('admin', is_admin=True))
+    response = app.test_client().get(f'/api/orders/admin?{query}', headers=headers)
+    assert response.status_code == 400
+    assert 'must be a non-negative whole number' in response.get_json()['message']
+
+
+def test_admin_listing_pages_with_limit_and_after(app):
+    with app.app_context():
+        headers = auth_header(add_user('admin', is_admin=True))
+        user, meal = add_user('user'), add_meal('Ugali', 6.0)
+        ids = [add_order(user, meal).id for _ in range(3)]
+    client = app.test_client()
+
+    first = client.get('/api/orders/admin?limit=2', headers=headers).get_json()
+    assert [order['id'] for order in first['orders']] == ids[:2]
+    rest = client.get(f"/api/orders/admin?limit=2&after={first['next_cursor']}", headers=headers).get_json()
+    assert [order['id'] for order in rest['orders']] == ids[2:]
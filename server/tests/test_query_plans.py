@@ -0,0 +1,52 @@
+# Query plans: the hot queries read orders, the archive and the rollups through an index, never a
+# full scan. Unfiltered full listings, exports without a date range over the archive and rollup
+# rebuilds read the whole table by design and are not checked.
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from analytics import day_aggregates_query
+from archive import order_source
+from config import db
+from models import ArchivedOrder, Order
+from orders import order_export_query, order_listing_query, user_orders_query
+from prep_board import prep_board_query
+from revenue import orders_revenue_query
+
+TABLE_SCAN = re.compile(r'\bSCAN (TABLE )?(orders|orders_archive|prep_counts)\b')
+TODAY = date(2024, 9, 5)
+MONTH_AGO = date(2024, 8, 5)
+
+HOT_QUERIES = {
+    'get_orders (user history)': lambda: user_orders_query(1),
+    'get_orders with archive': lambda: user_orders_query(1, start=MONTH_AGO, orders=order_source(True)),
+    'get_all_orders page after cursor': lambda: order_listing_query(after=100).limit(51),
+    'get_all_orders by status': lambda: order_listing_query(status='Pending').limit(51),
+    'get_all_orders by date': lambda: order_listing_query(start=TODAY, end=TODAY),
+    'get_all_orders by date and status': lambda: order_listing_query(status='Pending', start=TODAY, end=TODAY),
+    'bulk status reload by ids': lambda: order_listing_query(order_ids=[1, 2, 3]),
+    'bulk delete revenue delta': lambda: orders_revenue_query([1, 2, 3]),
+    'orders for a day': lambda: select(Order).where(Order.date == TODAY),
+    'orders for a meal option': lambda: select(Order.id).where(Order.meal_option_id == 1),
+    'export by date': lambda: order_export_query(start=MONTH_AGO, end=TODAY),
+    'export by date and status': lambda: order_export_query(status='Pending', start=MONTH_AGO, end=TODAY),
+    'export by status': lambda: order_export_query(status='Pending'),
+    'export by date with archive': lambda: order_export_query(start=MONTH_AGO, end=TODAY, orders=order_source(True)),
+    'reaches_archive': lambda: select(func.max(ArchivedOrder.date)),
+    'analytics day aggregates': lambda: day_aggregates_query(MONTH_AGO, TODAY),
+    'prep board': lambda: prep_board_query(TODAY),
+}
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}')]
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_an_index(app, name):
+    with app.app_context(), db.engine.connect() as connection:
+        plan = explain(connection, HOT_QUERIES[name]())
+    assert not [line for line in plan if TABLE_SCAN.search(line)], plan
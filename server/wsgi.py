@@ -0,0 +1,12 @@
+# WSGI entry point for production servers. From server/: `gunicorn` (settings in gunicorn.conf.py)
+from app import create_app
+from config import db
+
+app = create_app()
+
+# Run in each worker right after it is forked from a master that loaded the app (preload). Pooled
+# connections inherited from the master are dropped without closing them (close=False), which
+# would also close them for the master and the other workers; the worker opens its own.
+def after_fork():
+    with app.app_context():
+        db.engine.dispose(close=False)